@@ -0,0 +1,42 @@
+#
+# File: benchmarks/__main__.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+# Usage:
+#   python -m benchmarks --output bench.json                  # run and save results
+#   python -m benchmarks --compare baseline.json              # fail on regressions
+#   python -m benchmarks --filter overlay --rounds 30
+#
+
+import argparse
+import os
+import sys
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the companion's hot paths, headless and with fake services.")
+    parser.add_argument('--output', help="write results as JSON to this path")
+    parser.add_argument('--compare', metavar='BASELINE', help="compare medians against a previously saved results file")
+    parser.add_argument('--threshold', type=float, default=0.15, help="relative slowdown that counts as a regression (default 0.15)")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--rounds', type=int, default=15)
+    args = parser.parse_args()
+
+    # Must be set before Qt is imported anywhere.
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv)
+    from benchmarks import bench_core, bench_ui # registers the benchmarks
+    from benchmarks.harness import compare, run_all, write_results
+
+    results = run_all(name_filter=args.filter, rounds=args.rounds)
+    if args.output: write_results(args.output, results); print(f"\nResults written to {args.output}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
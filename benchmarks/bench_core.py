@@ -0,0 +1,55 @@
+#
+# File: benchmarks/bench_core.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from benchmarks.harness import benchmark
+from src.core import settings_manager
+from src.core.history_manager import HistoryManager
+from src.core.prompt_builder import PromptBuilder
+import copy
+import os
+import tempfile
+
+SENTENCE = "This is a reasonably ordinary sentence that a user or the companion might write. "
+
+@benchmark("settings.save_settings")
+def bench_save_settings():
+    directory = tempfile.TemporaryDirectory(); original = settings_manager.CONFIG_FILE
+    settings_manager.CONFIG_FILE = os.path.join(directory.name, 'config.json')
+    settings = settings_manager.get_default_config()
+    def teardown(): settings_manager.CONFIG_FILE = original; directory.cleanup()
+    return (lambda: settings_manager.save_settings(settings)), teardown
+
+@benchmark("settings.load_settings")
+def bench_load_settings():
+    directory = tempfile.TemporaryDirectory(); original = settings_manager.CONFIG_FILE
+    settings_manager.CONFIG_FILE = os.path.join(directory.name, 'config.json')
+    settings_manager.save_settings(settings_manager.get_default_config())
+    def teardown(): settings_manager.CONFIG_FILE = original; directory.cleanup()
+    return settings_manager.load_settings, teardown
+
+@benchmark("prompt.build", params=[10, 50, 200])
+def bench_prompt_build(message_count):
+    # What each turn does before the request leaves: budget-trim history, add the volatile tail.
+    history = HistoryManager(); builder = PromptBuilder()
+    for i in range(message_count): history.add('user' if i % 2 == 0 else 'assistant', SENTENCE * 3)
+    system_prompt = settings_manager.get_default_config()['ai_personality']['system_prompt']
+    return lambda: builder.build(history, system_prompt, "The user is currently in an application with the window title: 'main.py - Editor'.")
+
+@benchmark("core.CoreService", calls_per_round=1)
+def bench_core_service():
+    from benchmarks import fakes
+    from src.core.app_logic import CoreService
+    fakes.install()
+    directory = tempfile.TemporaryDirectory()
+    settings = copy.deepcopy(settings_manager.get_default_config())
+    settings['proactivity']['enabled'] = False
+    settings['storage']['database_path'] = os.path.join(directory.name, 'conversations.db')
+    settings['response_cache']['enabled'] = False
+    services = []
+    def teardown():
+        for core_service in services: core_service.shutdown()
+        directory.cleanup()
+    return (lambda: services.append(CoreService(copy.deepcopy(settings)))), teardown
@@ -0,0 +1,48 @@
+#
+# File: benchmarks/bench_ui.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from benchmarks.harness import benchmark
+from src.core.settings_manager import get_default_config
+from src.ui.overlay_window import OverlayWindow
+import itertools
+
+SCROLLBACK_SIZES = [0, 200, 1000]
+REPLY = "Sure. Here is a reply long enough to wrap over a couple of lines in the chat bubble, with a second sentence."
+
+def _overlay_with_scrollback(message_count):
+    overlay = OverlayWindow(get_default_config(), core_service=None)
+    for i in range(message_count):
+        overlay.append_message({'role': 'user' if i % 2 == 0 else 'assistant', 'content': REPLY})
+    overlay._flush_updates()
+    return overlay
+
+@benchmark("overlay.append_message", params=SCROLLBACK_SIZES, calls_per_round=1)
+def bench_append_message(scrollback):
+    # Queue one message and apply it, i.e. what happens within the frame it arrives in.
+    overlay = _overlay_with_scrollback(scrollback); counter = itertools.count()
+    def run():
+        overlay.append_message({'role': 'assistant', 'content': f"{REPLY} #{next(counter)}"})
+        overlay._flush_updates()
+    return run, overlay.deleteLater
+
+@benchmark("overlay.stream_update", params=SCROLLBACK_SIZES)
+def bench_stream_update(scrollback):
+    # One coalesced update of a streaming reply, i.e. what the flush timer does each frame.
+    overlay = _overlay_with_scrollback(scrollback); counter = itertools.count()
+    def run():
+        overlay.append_message({'role': 'assistant', 'content': f"{REPLY} {next(counter)}", 'partial': True})
+        overlay._flush_updates()
+    return run, overlay.deleteLater
+
+@benchmark("overlay.paintEvent", params=['on', 'off', 'warn', 'warming', 'chat'])
+def bench_paint(state):
+    overlay = OverlayWindow(get_default_config(), core_service=None)
+    if state == 'off': overlay.is_on = False
+    elif state == 'warn': overlay.has_tts_error = True
+    elif state == 'warming': overlay.ai_readiness = 'warming'
+    elif state == 'chat': overlay.append_message({'role': 'assistant', 'content': REPLY}); overlay._flush_updates()
+    # grab() renders the widget (and its children) offscreen, running paintEvent.
+    return overlay.grab, overlay.deleteLater
@@ -0,0 +1,203 @@
+#
+# File: benchmarks/e2e.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+# End-to-end latency as the user feels it: from pressing Enter in the overlay
+# to the first rendered token, the full reply and the first audio. Runs
+# offline against a local mock Ollama and fake speech services:
+#   python -m benchmarks.e2e --conversations 20 --concurrency 4 --token-delay-ms 30 --output e2e.json
+#
+
+import argparse
+import copy
+import json
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+
+STAGES = ('first_token', 'full_response', 'first_audio')
+DEFAULT_SCRIPT = ["Hi there!", "Can you give me a tip for staying focused?", "Thanks. What about taking breaks?",
+                  "Summarize that in one sentence."]
+
+def percentile(sorted_values, p):
+    if not sorted_values: return None
+    # Nearest-rank: the smallest value with at least p% of the samples at or below it.
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+def summarize(turns):
+    report = {}
+    for stage in STAGES:
+        values = sorted(turn[stage] for turn in turns if turn.get(stage) is not None)
+        report[stage] = {'count': len(values), 'p50_ms': percentile(values, 50), 'p95_ms': percentile(values, 95),
+                         'p99_ms': percentile(values, 99), 'mean_ms': sum(values) / len(values) if values else None}
+    report['turns'] = len(turns); report['errors'] = sum(1 for turn in turns if turn['error'])
+    return report
+
+def build_settings(args, base_url, data_dir):
+    from src.core.settings_manager import get_default_config
+    settings = copy.deepcopy(get_default_config())
+    settings['ai'].update({'provider': 'ollama', 'ollama_settings': {'host': base_url, 'model': 'mock', 'keep_alive': '30m'}})
+    settings['proactivity']['enabled'] = False
+    settings['context_awareness']['enabled'] = False
+    settings['voice']['enabled'] = not args.no_voice
+    settings['conversation']['coalesce_window_ms'] = 0 # scripted turns must not merge
+    settings['response_cache']['enabled'] = False
+    settings['storage']['database_path'] = os.path.join(data_dir, 'conversations.db')
+    return settings
+
+def run(args):
+    # Qt must see the platform choice before it is imported.
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+    from PyQt5.QtWidgets import QApplication
+    from benchmarks import fakes
+    from benchmarks.mock_ollama import MockOllamaServer
+    from src.core.app_logic import CoreService
+    from src.services import registry
+    from src.ui.overlay_window import OverlayWindow
+
+    class TimedTTSProvider(fakes.FakeTTSProvider):
+        """Fake speech with a fixed synthesis delay; remembers when playback of each chunk began."""
+        synth_delay = 0.05
+        def __init__(self, tts_config, elevenlabs_api_key=None):
+            super().__init__(tts_config, elevenlabs_api_key); self.played_at = []
+        def synthesize(self, text):
+            time.sleep(self.synth_delay); return text
+        def play_audio(self, audio, still_wanted=None):
+            self.played_at.append(time.perf_counter()); return True
+
+    class InstrumentedOverlay(OverlayWindow):
+        """The real overlay, reporting when a streamed token and the final reply reach the screen."""
+        def __init__(self, settings, core_service, on_rendered):
+            super().__init__(settings, core_service); self.on_rendered = on_rendered
+        def _apply_message(self, message_data):
+            super()._apply_message(message_data)
+            if message_data.get('partial'): self.on_rendered('partial')
+            elif message_data.get('role') == 'assistant': self.on_rendered('final')
+
+    class Session(QObject):
+        """One CoreService plus overlay working through a scripted conversation, one turn at a time."""
+        finished = pyqtSignal(object)
+
+        def __init__(self, settings, script, think_time_ms):
+            super().__init__()
+            self.script = list(script); self.think_time_ms = think_time_ms; self.turns = []; self.current = None
+            self.core = CoreService(copy.deepcopy(settings))
+            self.overlay = InstrumentedOverlay(self.core.settings, self.core, self._on_rendered)
+            self.overlay.user_message_sent.connect(self.core.process_user_message)
+            self.core.message_ready_for_ui.connect(self.overlay.append_message)
+            self.core.partial_message_ready.connect(self.overlay.append_message)
+            self.core.conversation_worker.turn_finished.connect(self._on_turn_finished)
+            self.ready_timer = QTimer(self); self.ready_timer.timeout.connect(self._start_when_ready); self.ready_timer.start(10)
+
+        def _start_when_ready(self):
+            ai_provider = self.core.ai_provider
+            if self.core.pending_startup_services or ai_provider is None or ai_provider.readiness == 'warming': return
+            self.ready_timer.stop(); self._next_turn()
+
+        def _next_turn(self):
+            if not self.script: self.finished.emit(self); return
+            self.overlay.input_field.setText(self.script.pop(0))
+            self.current = {'started_at': time.perf_counter(), 'first_token': None, 'full_response': None, 'first_audio': None}
+            self.overlay._handle_user_input() # what pressing Enter does
+
+        def _on_rendered(self, kind):
+            if self.current is None: return
+            elapsed_ms = (time.perf_counter() - self.current['started_at']) * 1000
+            if self.current['first_token'] is None: self.current['first_token'] = elapsed_ms
+            if kind == 'final': self.current['full_response'] = elapsed_ms
+
+        def _on_turn_finished(self, turn_id):
+            # Without speech the turn can end inside the overlay's 16 ms batching window; draw what's queued first.
+            self.overlay._flush_updates()
+            if self.current is None or self.current['full_response'] is None: return
+            turn, self.current = self.current, None
+            played = [t for t in getattr(self.core.tts_provider, 'played_at', []) if t >= turn['started_at']]
+            if played: turn['first_audio'] = (played[0] - turn['started_at']) * 1000
+            turn['error'] = self.core.ai_provider.last_error is not None; del turn['started_at']
+            self.turns.append(turn)
+            QTimer.singleShot(self.think_time_ms, self._next_turn)
+
+        def close(self):
+            self.core.shutdown(); self.overlay.deleteLater()
+
+    if not args.verbose:
+        for name in ("technical", "conversation"):
+            logging.getLogger(name).addHandler(logging.NullHandler()); logging.getLogger(name).propagate = False
+    app = QApplication.instance() or QApplication(sys.argv)
+    TimedTTSProvider.synth_delay = args.tts_delay_ms / 1000
+    registry.register('tts', TimedTTSProvider); registry.register('stt', fakes.FakeSTTProvider)
+    server = MockOllamaServer(first_token_delay_ms=args.first_token_delay_ms, token_delay_ms=args.token_delay_ms, jitter_ms=args.jitter_ms,
+                              tokens_per_reply=args.tokens, failure_rate=args.failure_rate, seed=args.seed).start()
+    scripts = [DEFAULT_SCRIPT]
+    if args.script:
+        with open(args.script, 'r', encoding="utf-8") as f: scripts = json.load(f)
+    data_dir = tempfile.TemporaryDirectory()
+    settings = build_settings(args, server.url, data_dir.name)
+    waiting = [scripts[i % len(scripts)] for i in range(args.conversations)]
+    active = set(); all_turns = []
+
+    def start_sessions():
+        while waiting and len(active) < args.concurrency:
+            session = Session(settings, waiting.pop(0), args.think_time_ms)
+            session.finished.connect(on_session_finished); active.add(session)
+        if not active: app.quit()
+
+    def on_session_finished(session):
+        all_turns.extend(session.turns); active.discard(session); session.close()
+        start_sessions()
+
+    def on_timeout():
+        print(f"Timed out after {args.timeout} s with {len(active)} conversation(s) still running.", file=sys.stderr)
+        for session in list(active): all_turns.extend(session.turns); session.close()
+        active.clear(); app.quit()
+
+    QTimer.singleShot(0, start_sessions)
+    QTimer.singleShot(int(args.timeout * 1000), on_timeout)
+    started_at = time.perf_counter()
+    app.exec_()
+    report = summarize(all_turns)
+    report.update({'wall_seconds': time.perf_counter() - started_at, 'mock_server': dict(server.counters),
+                   'config': {k: v for k, v in vars(args).items() if k not in ('output', 'verbose')}})
+    server.stop(); data_dir.cleanup()
+    return report
+
+def print_report(report):
+    print(f"{report['turns']} turns ({report['errors']} with errors) in {report['wall_seconds']:.1f} s")
+    print(f"{'stage':<16} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage in STAGES:
+        row = report[stage]
+        values = [f"{row[key]:.1f}" if row[key] is not None else "-" for key in ('p50_ms', 'p95_ms', 'p99_ms')]
+        print(f"{stage:<16} {row['count']:>6} {values[0]:>9} {values[1]:>9} {values[2]:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency against a local mock Ollama, headless.")
+    parser.add_argument('--conversations', type=int, default=10)
+    parser.add_argument('--concurrency', type=int, default=1, help="conversations running at the same time")
+    parser.add_argument('--script', help="JSON file with a list of conversations, each a list of user messages")
+    parser.add_argument('--think-time-ms', type=int, default=0, help="pause between a reply and the next user message")
+    parser.add_argument('--first-token-delay-ms', type=float, default=150)
+    parser.add_argument('--token-delay-ms', type=float, default=25)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--tokens', type=int, default=40, help="tokens per mock reply")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction of chat requests that fail")
+    parser.add_argument('--tts-delay-ms', type=float, default=50, help="fake synthesis time per sentence")
+    parser.add_argument('--no-voice', action='store_true', help="don't speak replies")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--output', help="write the report as JSON to this path")
+    parser.add_argument('--verbose', action='store_true', help="let the app's technical log through")
+    args = parser.parse_args()
+    report = run(args)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8") as f: json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#
+# File: benchmarks/fakes.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.services import registry
+from src.services.ai_provider import READY, ResponseStream
+
+class FakeAIProvider:
+    """Answers instantly with canned text, streamed a few words at a time."""
+    SETTINGS_KEYS = ('ai.provider',)
+    RESPONSE = "Here is a short, canned answer. It has two sentences so speech chunking has work to do."
+
+    def __init__(self, ai_config):
+        self.config = ai_config; self.provider = 'fake'
+        self.last_error = None; self.last_usage = None; self.readiness = READY
+
+    def start_warm_up(self, on_readiness=None):
+        if on_readiness: on_readiness(READY)
+
+    def get_response(self, message_history):
+        return "".join(self.stream_response(message_history)).strip()
+
+    def stream_response(self, message_history):
+        self.last_error = None
+        return ResponseStream(lambda stream: self._deltas())
+
+    def _deltas(self):
+        words = self.RESPONSE.split(' ')
+        for i in range(0, len(words), 3): yield " ".join(words[i:i + 3]) + " "
+
+class FakeTTSProvider:
+    """Synthesizes and plays nothing, successfully."""
+    SETTINGS_KEYS = ('voice',)
+
+    def __init__(self, tts_config, elevenlabs_api_key=None):
+        self.config = tts_config; self.provider = 'fake'
+
+    def is_available(self): return True
+    def synthesize(self, text): return text
+    def play_audio(self, audio, still_wanted=None): return True
+    def stop_playback(self): pass
+
+class FakeSTTProvider:
+    """Never hears anything; background listening is a no-op."""
+    SETTINGS_KEYS = ('audio_input.mic_device_index',)
+
+    def __init__(self, device_index=None, vad_settings=None):
+        self.device_index = device_index; self.is_listening = False
+
+    def start_background_listening(self, on_audio, on_speech=None): self.is_listening = True
+    def stop_background_listening(self): self.is_listening = False
+    def recognize(self, audio): return None
+    def listen_on_demand(self): return None
+
+def install():
+    """Points the service registry at the fakes, so CoreService builds them instead of real backends."""
+    registry.register('ai', FakeAIProvider)
+    registry.register('tts', FakeTTSProvider)
+    registry.register('stt', FakeSTTProvider)
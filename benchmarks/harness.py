@@ -0,0 +1,89 @@
+#
+# File: benchmarks/harness.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+import json
+import platform
+import statistics
+import time
+
+BENCHMARKS = [] # (name, function, param, calls_per_round)
+
+def benchmark(name, params=None, calls_per_round=None):
+    """
+    Registers a benchmark. The decorated function does its setup and returns
+    the callable to time, or (callable, teardown). With params, it is
+    registered once per value as "name[value]" and receives the value.
+    calls_per_round pins the batch size for operations whose cost grows with
+    every call (appending to scrollback, constructing services).
+    """
+    def register(function):
+        for param in (params or [None]):
+            BENCHMARKS.append((name if param is None else f"{name}[{param}]", function, param, calls_per_round))
+        return function
+    return register
+
+def _calibrate(run, min_round_seconds):
+    # Repeat cheap operations within a round so timer resolution doesn't dominate.
+    number = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(number): run()
+        if time.perf_counter() - started_at >= min_round_seconds or number >= 100000: return number
+        number *= 10
+
+def measure(run, rounds=15, min_round_seconds=0.02, calls_per_round=None):
+    run() # warm-up
+    number = calls_per_round or _calibrate(run, min_round_seconds)
+    samples = []
+    for _ in range(rounds):
+        started_at = time.perf_counter()
+        for _ in range(number): run()
+        samples.append((time.perf_counter() - started_at) / number)
+    samples.sort()
+    return {'median_s': statistics.median(samples), 'min_s': samples[0], 'mean_s': statistics.fmean(samples),
+            'p95_s': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'stdev_s': statistics.stdev(samples) if len(samples) > 1 else 0.0, 'rounds': rounds, 'calls_per_round': number}
+
+def run_all(name_filter=None, rounds=15):
+    results = {}
+    for name, function, param, calls_per_round in BENCHMARKS:
+        if name_filter and name_filter not in name: continue
+        prepared = function(param) if param is not None else function()
+        run, teardown = prepared if isinstance(prepared, tuple) else (prepared, None)
+        try:
+            results[name] = measure(run, rounds=rounds, calls_per_round=calls_per_round)
+        finally:
+            if teardown: teardown()
+        print(f"{name:<48} {_format_seconds(results[name]['median_s']):>12}  (p95 {_format_seconds(results[name]['p95_s'])})")
+    return results
+
+def environment():
+    from PyQt5.QtCore import QT_VERSION_STR
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'qt': QT_VERSION_STR,
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+def write_results(path, results):
+    with open(path, 'w', encoding="utf-8") as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+def compare(results, baseline_path, threshold):
+    """Prints median changes against a saved run; returns the names that got slower than threshold."""
+    with open(baseline_path, 'r', encoding="utf-8") as f:
+        baseline = json.load(f)['results']
+    regressions = []
+    print(f"\n{'benchmark':<48} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline: print(f"{name:<48} {'(new)':>12} {_format_seconds(result['median_s']):>12}"); continue
+        before = baseline[name]['median_s']; change = (result['median_s'] - before) / before if before else 0.0
+        flag = "  REGRESSION" if change > threshold else ""
+        if flag: regressions.append(name)
+        print(f"{name:<48} {_format_seconds(before):>12} {_format_seconds(result['median_s']):>12} {change:>+8.1%}{flag}")
+    return regressions
+
+def _format_seconds(seconds):
+    if seconds >= 1: return f"{seconds:.3f} s"
+    if seconds >= 1e-3: return f"{seconds * 1e3:.3f} ms"
+    return f"{seconds * 1e6:.2f} us"
@@ -0,0 +1,149 @@
+#
+# File: benchmarks/mock_ollama.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+# A local stand-in for Ollama's /api/chat and /api/generate, for offline
+# latency measurements. Run on its own with:
+#   python -m benchmarks.mock_ollama --port 11434 --token-delay-ms 30
+#
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+WORDS = ("sure here is a quick thought about what you are working on and one small idea that "
+         "might help you get it done a little faster today").split()
+FAILURE_MODES = ('http_500', 'stream_error', 'disconnect')
+
+class MockOllamaServer:
+    """
+    Streams canned replies as newline-delimited JSON, like Ollama does, with a
+    configurable first-token delay, per-token delay and jitter. A fraction of
+    chat requests fail (HTTP 500, an error object mid-stream, or a dropped
+    connection) so fallback and error paths can be measured too.
+    """
+    def __init__(self, host='127.0.0.1', port=0, first_token_delay_ms=150, token_delay_ms=25, jitter_ms=10,
+                 tokens_per_reply=40, failure_rate=0.0, seed=None):
+        self.first_token_delay = first_token_delay_ms / 1000; self.token_delay = token_delay_ms / 1000
+        self.jitter = jitter_ms / 1000; self.tokens_per_reply = tokens_per_reply; self.failure_rate = failure_rate
+        self.random = random.Random(seed); self.random_lock = threading.Lock()
+        self.counters = {'chat': 0, 'generate': 0, 'failures': 0}
+        self.httpd = _Server((host, port), _Handler); self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="MockOllama", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown(); self.httpd.server_close()
+
+    def draw(self):
+        """(failure mode or None, delay jitter sampler) for one request; the RNG is shared across handler threads."""
+        with self.random_lock:
+            failure = self.random.choice(FAILURE_MODES) if self.random.random() < self.failure_rate else None
+            delays = [max(0.0, self.token_delay + self.random.uniform(-self.jitter, self.jitter)) for _ in range(self.tokens_per_reply)]
+        return failure, delays
+
+    def reply_tokens(self):
+        # Punctuate every dozen words so sentence-chunked speech has boundaries to split on.
+        tokens = []
+        for i in range(self.tokens_per_reply):
+            word = WORDS[i % len(WORDS)]
+            tokens.append((word.capitalize() if i % 12 == 0 else word) + ("." if i % 12 == 11 or i == self.tokens_per_reply - 1 else "") + " ")
+        return tokens
+
+class _Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Pooled keep-alive connections are dropped by the client at the end of a run; that's not an error.
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)): return
+        super().handle_error(request, client_address)
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # chunked streaming on kept-alive connections, as Ollama does
+
+    def log_message(self, format, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ConnectionResetError, BrokenPipeError):
+            self.close_connection = True # the client closed a kept-alive connection between requests
+
+    def do_POST(self):
+        mock = self.server.mock
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b"{}")
+        if self.path == '/api/generate':
+            mock.counters['generate'] += 1
+            return self._send_json({'model': body.get('model'), 'response': '', 'done': True, 'load_duration': 0})
+        if self.path != '/api/chat':
+            return self._send_json({'error': 'not found'}, status=404)
+        mock.counters['chat'] += 1
+        failure, delays = mock.draw()
+        if failure: mock.counters['failures'] += 1
+        if failure == 'http_500':
+            return self._send_json({'error': 'injected failure'}, status=500)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson'); self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        prompt_tokens = sum(len(m.get('content', '')) for m in body.get('messages', [])) // 4
+        started_at = time.monotonic()
+        time.sleep(mock.first_token_delay)
+        tokens = mock.reply_tokens()
+        try:
+            for i, (token, delay) in enumerate(zip(tokens, delays)):
+                if failure and i == len(tokens) // 2:
+                    if failure == 'disconnect': self.close_connection = True; return
+                    self._write_chunk({'error': 'injected failure'}); break
+                self._write_chunk({'model': body.get('model'), 'message': {'role': 'assistant', 'content': token}, 'done': False})
+                time.sleep(delay)
+            else:
+                self._write_chunk({'model': body.get('model'), 'message': {'role': 'assistant', 'content': ''}, 'done': True,
+                                   'load_duration': 0, 'prompt_eval_count': prompt_tokens, 'eval_count': len(tokens),
+                                   'total_duration': int((time.monotonic() - started_at) * 1e9)})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True # The client cancelled the turn.
+
+    def _write_chunk(self, payload):
+        data = (json.dumps(payload) + "\n").encode('utf-8')
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n"); self.wfile.flush()
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json'); self.send_header('Content-Length', str(len(data)))
+        self.end_headers(); self.wfile.write(data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Ollama /api/chat for offline testing.")
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--first-token-delay-ms', type=float, default=150)
+    parser.add_argument('--token-delay-ms', type=float, default=25)
+    parser.add_argument('--jitter-ms', type=float, default=10)
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    server = MockOllamaServer(port=args.port, first_token_delay_ms=args.first_token_delay_ms, token_delay_ms=args.token_delay_ms,
+                              jitter_ms=args.jitter_ms, tokens_per_reply=args.tokens, failure_rate=args.failure_rate)
+    print(f"Mock Ollama listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -4,44 +4,52 @@
 # ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
 #
 
-import sys; import os; import logging
-from PyQt5.QtWidgets import QApplication
-from src.core.settings_manager import load_settings
-from src.core.app_logic import CoreService
-from src.ui.overlay_window import OverlayWindow
-
-def setup_logging():
-    log_dir = "logs"
-    if not os.path.exists(log_dir): os.makedirs(log_dir)
-    tech_logger = logging.getLogger("technical"); tech_logger.setLevel(logging.INFO)
-    tech_handler = logging.FileHandler(os.path.join(log_dir, "technical.log"), mode='a', encoding='utf-8')
-    tech_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(module)s - %(message)s'))
-    tech_logger.addHandler(tech_handler)
-    conv_logger = logging.getLogger("conversation"); conv_logger.setLevel(logging.INFO)
-    conv_handler = logging.FileHandler(os.path.join(log_dir, "conversation.log"), mode='a', encoding='utf-8')
-    conv_handler.setFormatter(logging.Formatter('%(asctime)s - %(message)s'))
-    conv_logger.addHandler(conv_handler)
-    tech_logger.info("="*50 + "\n" + " "*15 + "Application Starting Up..." + "\n" + "="*50)
-    conv_logger.info("="*20 + " New Session Started " + "="*20)
+import sys; import logging
+from src.core.startup_timing import startup_timer
+with startup_timer.measure("import", "PyQt5"):
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+with startup_timer.measure("import", "src.core (settings, logging, app logic)"):
+    from src.core.settings_manager import load_settings
+    from src.core.logging_setup import setup_logging
+    from src.core.app_logic import CoreService
+with startup_timer.measure("import", "src.ui.overlay_window"):
+    from src.ui.overlay_window import OverlayWindow
+    from src.services.device_inventory import DeviceInventory
 
 def main():
-    setup_logging()
-    app = QApplication(sys.argv)
     settings = load_settings()
+    log_listener = setup_logging(settings.get('logging') if settings else None)
+    logging.getLogger("technical").info("="*50 + "\n" + " "*15 + "Application Starting Up..." + "\n" + "="*50)
+    logging.getLogger("conversation").info("="*20 + " New Session Started " + "="*20)
+    app = QApplication(sys.argv)
     if not settings:
         logging.getLogger("technical").critical("Could not load settings. Exiting.")
-        sys.exit(1)
-    core_service = CoreService(settings)
+        log_listener.stop(); sys.exit(1)
+    with startup_timer.measure("init", "CoreService"):
+        core_service = CoreService(settings)
+    app.aboutToQuit.connect(core_service.shutdown)
     overlay = OverlayWindow(settings, core_service)
     overlay.state_toggled.connect(core_service.set_state)
     overlay.user_message_sent.connect(core_service.process_user_message)
     overlay.voice_input_triggered.connect(core_service.handle_voice_input)
     core_service.message_ready_for_ui.connect(overlay.append_message)
+    core_service.partial_message_ready.connect(overlay.append_message)
     core_service.new_conversation_started.connect(overlay.clear_chat_display)
     core_service.tts_status_updated.connect(overlay.update_tts_status)
     core_service.is_listening_updated.connect(overlay.update_listening_status)
+    core_service.ai_readiness_updated.connect(overlay.update_ai_readiness)
+    core_service.ui_settings_changed.connect(overlay.apply_ui_settings)
     overlay.show()
-    sys.exit(app.exec_())
+    startup_timer.mark("overlay shown")
+    QTimer.singleShot(0, lambda: startup_timer.mark("event loop running"))
+    # Enumerate audio devices in the background so Settings opens with them ready, but only once the
+    # microphone is open: PortAudio's initialize/terminate aren't safe to run on two threads at once.
+    DeviceInventory.instance().set_voice_source(core_service.list_local_voices)
+    core_service.startup_finished.connect(DeviceInventory.instance().ensure_loaded)
+    exit_code = app.exec_()
+    log_listener.stop() # Flush whatever is still queued before the process exits.
+    sys.exit(exit_code)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
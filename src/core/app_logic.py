@@ -4,98 +4,251 @@
 # ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
 #
 
-from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
-from src.services.ai_provider import AIProvider
-from src.services.tts_provider import TTSProvider
-from src.services.stt_provider import STTProvider
-import datetime
-import pygetwindow as gw
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal, pyqtSlot
+from src.core.conversation_worker import ConversationWorker, TurnHandle, VoiceInputWorker
+from src.core.history_manager import HistoryManager
+from src.core.metrics import metrics
+from src.core.prompt_builder import PromptBuilder
+from src.core.conversation_store import PROMPT_ROLE, ConversationStore
+from src.core.settings_diff import diff_settings, touches
+from src.core.proactive_scheduler import ProactiveScheduler
+from src.core.startup_timing import startup_timer, timed_import
+from src.services import registry
+from src.services.ai_provider import AIResponseError
+from src.services.audio_output import AudioOutput
+from src.services.audio_sink import audio_sink
+from src.services.http_pool import http_pool
+from src.services.response_cache import ResponseCache
+from src.services.transcription_queue import TranscriptionQueue
+import copy
 import logging
+import time
 
 class CoreService(QObject):
+    # Settings no service re-reads at runtime; a change is logged as needing a restart.
+    RESTART_REQUIRED_KEYS = ('logging',)
     # ... (signals are unchanged) ...
     message_ready_for_ui = pyqtSignal(dict); new_conversation_started = pyqtSignal()
+    partial_message_ready = pyqtSignal(dict)
     tts_status_updated = pyqtSignal(bool); is_listening_updated = pyqtSignal(bool)
+    ai_readiness_updated = pyqtSignal(str) # 'ready', 'warming' or 'unavailable'
+    startup_finished = pyqtSignal() # every provider has been built once
+    ui_settings_changed = pyqtSignal(dict) # the 'ui' section, after an edit that the overlay applies live
+    # Internal: hand work to the worker threads (queued across threads).
+    turn_requested = pyqtSignal(list, object); listen_requested = pyqtSignal()
+    services_rebuild_requested = pyqtSignal(list); stt_rebuild_requested = pyqtSignal()
 
     def __init__(self, settings):
         super().__init__()
         self.settings = settings
         self.is_on = True; self.has_greeted = False; self.tts_error_state = False
-        self.conversation_history = []
+        self.is_capturing_voice = False; self.streaming_text = ""
+        self.active_turn = None; self.last_user_message_at = 0.0
+        self.history = HistoryManager(summarizer=self._summarize_history)
+        self.prompt_builder = PromptBuilder()
+        self.store = ConversationStore.from_settings(settings.get('storage')); self.session_id = None; self.session_kind = None
         self.tech_logger = logging.getLogger("technical"); self.conv_logger = logging.getLogger("conversation")
+        self.ai_provider = None; self.tts_provider = None; self.stt_provider = None
+        self.pending_startup_services = {'ai', 'tts', 'stt'}
+        self.audio_output = AudioOutput() # the one thread that plays speech, whichever turn it belongs to
+        self._start_workers()
+        self._start_transcriber()
         self.initialize_services()
-        self.proactive_timer = QTimer(self)
-        self.proactive_timer.timeout.connect(self.trigger_proactive_event)
+        self.proactive_scheduler = ProactiveScheduler(self._get_active_window_title, self, is_busy=self._user_turn_in_progress)
+        self.proactive_scheduler.proactive_due.connect(self.trigger_proactive_event)
+        # A burst of quick messages waits for a short lull, then goes out as one request.
+        self.coalesce_timer = QTimer(self); self.coalesce_timer.setSingleShot(True)
+        self.coalesce_timer.timeout.connect(lambda: self._dispatch_turn('user'))
         self.update_timer_from_settings()
-        self.manage_background_listener()
 
     def initialize_services(self):
         self.tech_logger.info("Initializing services...")
-        ai_config = self.settings.get('ai', {})
-        self.ai_provider = AIProvider(ai_config=ai_config)
-        
-        # --- UPDATED to pass correct config to the new TTS provider ---
-        tts_config = self.settings.get('voice', {})
-        elevenlabs_api_key = self.settings.get('ai', {}).get('elevenlabs_api_key', '')
-        self.tts_provider = TTSProvider(tts_config=tts_config, elevenlabs_api_key=elevenlabs_api_key)
+        # The pool outlives the providers, so rebuilt providers pick up warm connections.
+        http_pool.configure(self.settings.get('network', {}))
+        metrics.configure(self.settings.get('metrics'))
+        self.response_cache = ResponseCache.from_settings(self.settings.get('response_cache'))
+        self.history.configure(self.settings.get('conversation'))
+        self.prompt_builder.configure(self.settings.get('conversation'))
+        # Providers come up on the worker threads so the overlay can show immediately.
+        # Work queued to a worker afterwards (a turn, a listen) runs after its build.
+        self.services_rebuild_requested.emit(['ai', 'tts']); self.stt_rebuild_requested.emit()
+
+    def build_service(self, name):
+        """Constructs one provider from the current settings. May block; callers pick the thread."""
+        provider_class = registry.load(name)
+        with startup_timer.measure("init", f"{name} provider"):
+            if name == 'ai':
+                return provider_class(ai_config=self.settings.get('ai', {}))
+            elif name == 'tts':
+                # --- UPDATED to pass correct config to the new TTS provider ---
+                tts_config = self.settings.get('voice', {})
+                elevenlabs_api_key = self.settings.get('ai', {}).get('elevenlabs_api_key', '')
+                return provider_class(tts_config=tts_config, elevenlabs_api_key=elevenlabs_api_key)
+            elif name == 'stt':
+                audio_input = self.settings.get('audio_input', {})
+                return provider_class(device_index=audio_input.get('mic_device_index'), vad_settings=audio_input.get('vad'))
+        raise ValueError(f"Unknown service '{name}'")
+
+    def _start_workers(self):
+        # Provider calls (LLM, TTS, on-demand STT) block for seconds; keep them off the GUI thread.
+        self.conversation_thread = QThread(self); self.conversation_thread.setObjectName("ConversationWorker")
+        self.conversation_worker = ConversationWorker(self)
+        self.conversation_worker.moveToThread(self.conversation_thread)
+        self.turn_requested.connect(self.conversation_worker.run_turn)
+        self.conversation_worker.response_delta.connect(self._on_ai_response_delta)
+        self.conversation_worker.response_ready.connect(self._on_ai_response)
+        self.conversation_worker.response_interrupted.connect(self._on_ai_response_interrupted)
+        self.conversation_worker.speech_finished.connect(self._on_speech_finished)
+        self.conversation_worker.turn_finished.connect(self._on_turn_finished)
+        self.services_rebuild_requested.connect(self.conversation_worker.rebuild_services)
+        self.conversation_worker.services_rebuilt.connect(self._on_services_rebuilt)
+        self.conversation_thread.start()
+        # Voice capture gets its own thread so click-to-talk isn't queued behind a turn in flight.
+        self.voice_thread = QThread(self); self.voice_thread.setObjectName("VoiceInputWorker")
+        self.voice_worker = VoiceInputWorker(self)
+        self.voice_worker.moveToThread(self.voice_thread)
+        self.listen_requested.connect(self.voice_worker.listen)
+        self.voice_worker.transcription_ready.connect(self._on_transcription_ready)
+        self.stt_rebuild_requested.connect(self.voice_worker.rebuild_stt)
+        self.voice_worker.stt_rebuilt.connect(self._on_stt_rebuilt)
+        self.voice_thread.start()
+
+    def _start_transcriber(self):
+        # Always-on phrases are recognized by a worker pool; results arrive here on the GUI thread.
+        self.transcriber = TranscriptionQueue.from_settings(self._recognize_phrase, self.settings.get('audio_input', {}).get('transcription'))
+        self.transcriber.transcription_ready.connect(self.process_user_message)
+
+    def _submit_phrase(self, audio):
+        # Looked up per phrase, so a replaced transcriber takes over without restarting the listener.
+        self.transcriber.submit(audio)
 
-        mic_index = self.settings.get('audio_input', {}).get('mic_device_index')
-        self.stt_provider = STTProvider(device_index=mic_index)
+    def _recognize_phrase(self, audio):
+        stt_provider = self.stt_provider
+        return stt_provider.recognize(audio) if stt_provider else None
+
+    def shutdown(self):
+        self.tech_logger.info("Core service shutting down.")
+        self._cancel_active_turn("the app is shutting down")
+        self.proactive_scheduler.stop()
+        if self.stt_provider: self.stt_provider.stop_background_listening()
+        self.transcriber.stop()
+        self.audio_output.stop(); audio_sink.close()
+        for thread in (self.conversation_thread, self.voice_thread):
+            thread.quit()
+            if not thread.wait(2000):
+                # Still inside a blocking provider call; Qt aborts the process if a running QThread is destroyed.
+                self.tech_logger.warning(f"{thread.objectName()} is still busy; waiting for it to finish before exiting.")
+                thread.wait()
+        if self.store: self.store.close()
+        metrics.stop()
 
     # ... (the rest of your file is unchanged from the previous logging version) ...
     def manage_background_listener(self):
+        if self.stt_provider is None: return # Still starting up; called again once it's built.
         is_always_on = self.settings.get('audio_input', {}).get('always_on_listening', False)
-        if is_always_on and self.is_on: self.stt_provider.start_background_listening(self.process_user_message)
+        if is_always_on and self.is_on: self.stt_provider.start_background_listening(self._submit_phrase, on_speech=self._on_user_speech)
         else: self.stt_provider.stop_background_listening()
             
     def update_settings(self, new_settings):
-        self.tech_logger.info("Core service applying settings update.")
-        self.stt_provider.stop_background_listening()
-        self.settings = new_settings; self.tts_error_state = False
-        self.tts_status_updated.emit(True); self.initialize_services()
-        self.update_timer_from_settings(); self.manage_background_listener()
+        # Copy: the settings dialog keeps editing its dict, which would hide the next diff.
+        new_settings = copy.deepcopy(new_settings)
+        changed = diff_settings(self.settings, new_settings)
+        self.settings = new_settings; self.tts_error_state = False; self.tts_status_updated.emit(True)
+        if not changed:
+            self.tech_logger.info("Settings saved with no changes."); return
+        self.tech_logger.info(f"Core service applying settings update. Changed: {', '.join(sorted(changed))}")
+        # Cheap, lock-protected reconfiguration happens inline; provider rebuilds go to the worker threads.
+        if touches(changed, ('network',)): http_pool.configure(self.settings.get('network', {}))
+        if touches(changed, ('metrics',)): metrics.configure(self.settings.get('metrics'))
+        if touches(changed, ('response_cache',)): self.response_cache = ResponseCache.from_settings(self.settings.get('response_cache'))
+        if touches(changed, ('conversation',)):
+            self.history.configure(self.settings.get('conversation')); self.prompt_builder.configure(self.settings.get('conversation'))
+        if touches(changed, ('audio_input.transcription',)): self.transcriber.stop(); self._start_transcriber()
+        rebuild = [name for name in ('ai', 'tts') if touches(changed, registry.load(name).SETTINGS_KEYS)]
+        if rebuild: self.services_rebuild_requested.emit(rebuild)
+        if touches(changed, registry.load('stt').SETTINGS_KEYS):
+            if self.stt_provider: self.stt_provider.stop_background_listening()
+            self.stt_rebuild_requested.emit()
+        elif touches(changed, ('audio_input.always_on_listening',)):
+            self.manage_background_listener()
+        if touches(changed, ('proactivity',)): self.update_timer_from_settings()
+        if touches(changed, ('storage',)): self._reopen_store()
+        if touches(changed, ('ui.chat_scrollback',)): self.ui_settings_changed.emit(self.settings.get('ui', {}))
+        needs_restart = [key for key in self.RESTART_REQUIRED_KEYS if touches(changed, (key,))]
+        if needs_restart: self.tech_logger.warning(f"Changes to {', '.join(needs_restart)} settings take effect after a restart.")
+
+    @pyqtSlot(list)
+    def _on_services_rebuilt(self, service_names):
+        self.tech_logger.info(f"Rebuilt services: {', '.join(service_names)}")
+        # Emitting from the warm-up thread is fine; Qt queues the signal to the overlay.
+        if 'ai' in service_names and self.ai_provider: self.ai_provider.start_warm_up(self.ai_readiness_updated.emit)
+        self._mark_started(service_names)
+
+    @pyqtSlot()
+    def _on_stt_rebuilt(self):
+        self.manage_background_listener(); self._mark_started(['stt'])
+
+    def _mark_started(self, service_names):
+        if not self.pending_startup_services: return
+        self.pending_startup_services.difference_update(service_names)
+        if not self.pending_startup_services: startup_timer.finish(); self.startup_finished.emit()
 
     def update_timer_from_settings(self):
-        proactivity_settings = self.settings.get('proactivity', {})
-        if self.is_on and proactivity_settings.get('enabled', False):
-            frequency_ms = proactivity_settings.get('frequency_seconds', 60) * 1000
-            self.proactive_timer.start(frequency_ms)
-            self.tech_logger.info(f"Proactive timer (re)started. Firing every {frequency_ms / 1000} seconds.")
-        else:
-            self.proactive_timer.stop(); self.tech_logger.info("Proactive timer stopped.")
+        self.proactive_scheduler.configure(self.settings.get('proactivity', {}), is_on=self.is_on)
 
     def set_state(self, is_on):
         self.is_on = is_on; self.tech_logger.info(f"Companion state set to: {'On' if self.is_on else 'Off'}")
         self.update_timer_from_settings(); self.manage_background_listener()
     
-    def _get_active_window_context(self):
+    def _get_active_window_title(self):
         try:
-            active_window = gw.getActiveWindow()
-            if active_window: return f"The user is currently in an application with the window title: '{active_window.title}'."
+            active_window = timed_import('pygetwindow').getActiveWindow()
+            if active_window: return active_window.title
         except Exception as e: self.tech_logger.warning(f"Could not get active window: {e}")
+        return None
+
+    def _get_active_window_context(self):
+        title = self._get_active_window_title()
+        if title is not None: return f"The user is currently in an application with the window title: '{title}'."
         return "Could not determine the user's current application."
         
+    def _user_turn_in_progress(self):
+        return self.coalesce_timer.isActive() or bool(self.active_turn and self.active_turn.kind == 'user')
+
     def trigger_proactive_event(self):
         if not self.is_on: return
         self.tech_logger.info("Triggering New Proactive Conversation.")
-        self.conversation_history.clear(); self.new_conversation_started.emit()
+        self.history.clear(); self.new_conversation_started.emit()
         self.conv_logger.info("--- Proactive Conversation Started ---")
+        self._start_session('proactive')
         if not self.has_greeted:
             prompt = "Start with a brief, friendly greeting... offer a helpful tip or an encouraging thought."
             self.has_greeted = True; self.tech_logger.info("First interaction: Sending greeting prompt.")
         else:
             prompt = "Based on the context... offer a brief, relevant, and helpful tip... Do NOT include a greeting."
             self.tech_logger.info("Subsequent interaction: Sending direct prompt.")
-        self._get_and_process_ai_response(prompt)
+        # Proactive prompts repeat verbatim, so they are the ones worth caching.
+        self._cancel_active_turn("a new proactive event started")
+        self._add_user_prompt(prompt, stored_role=PROMPT_ROLE); self._dispatch_turn('proactive', cacheable=True)
         
+    def _on_user_speech(self):
+        # Capture thread: the user is talking, so the companion stops.
+        if not self.settings.get('voice', {}).get('playback', {}).get('barge_in', True): return
+        if self.audio_output.barge_in(): self.tech_logger.info("User started speaking; stopped playback.")
+
     def handle_voice_input(self):
         if not self.is_on: return
-        if self.stt_provider.is_listening:
+        if self.stt_provider and self.stt_provider.is_listening:
             self.tech_logger.info("Ignoring click-to-talk because 'Always-On' is active.")
             return
-        self.is_listening_updated.emit(True)
-        transcribed_text = self.stt_provider.listen_on_demand()
-        self.is_listening_updated.emit(False)
+        if self.is_capturing_voice: return
+        self.is_capturing_voice = True; self.proactive_scheduler.note_user_activity()
+        self.audio_output.barge_in() # talking over the companion to answer it shouldn't need to wait it out
+        self.is_listening_updated.emit(True); self.listen_requested.emit()
+
+    @pyqtSlot(object)
+    def _on_transcription_ready(self, transcribed_text):
+        self.is_capturing_voice = False; self.is_listening_updated.emit(False)
         if transcribed_text: self.process_user_message(transcribed_text)
         else: self.message_ready_for_ui.emit({'role': 'assistant', 'content': "Sorry, I didn't catch that."})
             
@@ -103,29 +256,124 @@ class CoreService(QObject):
     def process_user_message(self, user_text):
         if not self.is_on: return
         self.tech_logger.info(f"Processing User Message: '{user_text}'")
-        if not self.conversation_history:
+        self.proactive_scheduler.note_user_activity()
+        # Whatever is in flight is answering a question the user has moved past.
+        previous_turn = self.active_turn
+        self._cancel_active_turn("superseded by a newer user message")
+        if self.history.is_empty():
             self.new_conversation_started.emit()
             self.conv_logger.info("--- User-Initiated Conversation Started ---")
+            self._start_session('user')
         self.message_ready_for_ui.emit({'role': 'user', 'content': user_text})
-        self._get_and_process_ai_response(user_text)
+        self._add_user_prompt(user_text)
+        now = time.monotonic()
+        window_ms = self.settings.get('conversation', {}).get('coalesce_window_ms', 600)
+        in_burst = (now - self.last_user_message_at) * 1000 < window_ms and \
+                   (self.coalesce_timer.isActive() or (previous_turn and previous_turn.kind == 'user'))
+        self.last_user_message_at = now
+        if in_burst:
+            self.tech_logger.info("Coalescing rapid user messages into one request.")
+            self.coalesce_timer.start(window_ms)
+        else:
+            self._dispatch_turn('user')
 
-    def _get_and_process_ai_response(self, user_prompt):
+    def _add_user_prompt(self, user_prompt, stored_role='user'):
         self.conv_logger.info(f"USER: {user_prompt}")
-        self.conversation_history.append({'role': 'user', 'content': user_prompt})
+        self.history.add('user', user_prompt); self._record_turn(stored_role, user_prompt)
+
+    def _dispatch_turn(self, kind, cacheable=False):
         system_prompt_text = self.settings.get('ai_personality', {}).get('system_prompt', 'You are a helpful assistant.')
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        full_system_prompt = f"{system_prompt_text}\n\nCurrent date and time is: {now}."
-        if self.settings.get('context_awareness', {}).get('enabled', False) and len(self.conversation_history) <= 1:
+        window_context = None
+        if self.settings.get('context_awareness', {}).get('enabled', False) and self.history.message_count <= 1:
             window_context = self._get_active_window_context()
             self.tech_logger.info(f"Context awareness: {window_context}")
-            full_system_prompt += f"\n\n{window_context}"
-        messages_to_send = [{'role': 'system', 'content': full_system_prompt}] + self.conversation_history
-        ai_response = self.ai_provider.get_response(messages_to_send)
+        # The personality prompt stays byte-identical across turns; time and window context go last.
+        messages_to_send = self.prompt_builder.build(self.history, system_prompt_text, window_context)
+        speak = self.settings.get('voice', {}).get('enabled', False) and not self.tts_error_state
+        if self.tts_error_state:
+            self.tech_logger.info("[TTS Fallback] TTS temporarily disabled due to a previous error.")
+        self.active_turn = TurnHandle(kind, speak=speak, cacheable=cacheable); self.streaming_text = ""
+        self.turn_requested.emit(messages_to_send, self.active_turn)
+
+    def _cancel_active_turn(self, reason):
+        self.coalesce_timer.stop()
+        if self.active_turn is None: return
+        self.tech_logger.info(f"Cancelling turn {self.active_turn.turn_id} ({self.active_turn.kind}): {reason}.")
+        self.active_turn.cancel(); self.active_turn = None; self.streaming_text = ""
+
+    def _is_current_turn(self, turn_id):
+        return self.active_turn is not None and self.active_turn.turn_id == turn_id
+
+    @pyqtSlot(int, str)
+    def _on_ai_response_delta(self, turn_id, delta):
+        if not self._is_current_turn(turn_id): return # Late delta from a cancelled turn.
+        self.streaming_text += delta
+        self.partial_message_ready.emit({'role': 'assistant', 'content': self.streaming_text.lstrip(), 'partial': True, 'turn_id': turn_id})
+
+    @pyqtSlot(int, str)
+    def _on_ai_response(self, turn_id, ai_response):
+        if not self._is_current_turn(turn_id): return
+        self.streaming_text = ""
         self.conv_logger.info(f"AI: {ai_response}")
-        self.conversation_history.append({'role': 'assistant', 'content': ai_response})
-        self.message_ready_for_ui.emit({'role': 'assistant', 'content': ai_response})
-        if self.settings.get('voice', {}).get('enabled', False) and not self.tts_error_state:
-            success = self.tts_provider.speak(ai_response)
-            if not success: self.tts_error_state = True; self.tts_status_updated.emit(False)
-        elif self.tts_error_state:
-            self.tech_logger.info("[TTS Fallback] TTS temporarily disabled due to a previous error.")
\ No newline at end of file
+        self.history.add('assistant', ai_response); self._record_turn('assistant', ai_response)
+        self.message_ready_for_ui.emit({'role': 'assistant', 'content': ai_response, 'turn_id': turn_id})
+
+    @pyqtSlot(int, str, str)
+    def _on_ai_response_interrupted(self, turn_id, partial_response, error_message):
+        if not self._is_current_turn(turn_id): return
+        self.streaming_text = ""
+        self.conv_logger.info(f"AI (cut off: {error_message}): {partial_response}")
+        # The partial reply stays on screen with the error under it, but it isn't kept as something the companion said.
+        if partial_response: self.message_ready_for_ui.emit({'role': 'assistant', 'content': partial_response, 'turn_id': turn_id})
+        self.message_ready_for_ui.emit({'role': 'system', 'content': error_message})
+
+    @pyqtSlot(int)
+    def _on_turn_finished(self, turn_id):
+        if self._is_current_turn(turn_id):
+            metrics.observe('turn_total', time.perf_counter() - self.active_turn.created_at, turn_id); self.active_turn = None
+        if self.ai_provider: self.ai_readiness_updated.emit(self.ai_provider.readiness)
+
+    def _start_session(self, kind):
+        self.session_kind = kind
+        self.session_id = self.store.start_session(kind) if self.store else None
+
+    def _reopen_store(self):
+        # Queued writes land in the old database first; the conversation in progress continues as a new session in the new one.
+        if self.store: self.store.close()
+        self.store = ConversationStore.from_settings(self.settings.get('storage'))
+        if self.session_id: self._start_session(self.session_kind)
+        self.tech_logger.info(f"Conversation storage {'reopened' if self.store else 'disabled'}.")
+
+    def _record_turn(self, role, content):
+        if self.store and self.session_id: self.store.add_turn(self.session_id, role, content)
+
+    def load_session(self, session_id):
+        """Reopens a stored conversation so the next message continues it."""
+        if not self.store: return False
+        self.store.flush(); messages = self.store.load_session(session_id)
+        if not messages: return False
+        # The model saw proactive instructions as user messages; the chat never showed them.
+        self.history.load([dict(m, role='user') if m['role'] == PROMPT_ROLE else m for m in messages]); self.session_id = session_id
+        self.new_conversation_started.emit()
+        for message in messages:
+            if message['role'] != PROMPT_ROLE: self.message_ready_for_ui.emit(message)
+        self.tech_logger.info(f"Reloaded session {session_id} ({len(messages)} messages).")
+        return True
+
+    def list_local_voices(self):
+        """The live local engine's voices, read on the playback thread that drives it; None without one."""
+        tts_provider = self.tts_provider
+        if getattr(tts_provider, 'local_engine', None) is None: return None
+        return self.audio_output.call(tts_provider.local_voices)
+
+    def _summarize_history(self, messages):
+        # Runs on the history manager's background thread.
+        try:
+            return self.ai_provider.get_response(messages)
+        except AIResponseError:
+            return None # keep the turns; summarizing is retried later
+
+    @pyqtSlot(int, bool)
+    def _on_speech_finished(self, turn_id, success):
+        if not success and not self.tts_error_state:
+            self.tts_error_state = True; self.tts_status_updated.emit(False)
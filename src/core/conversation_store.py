@@ -0,0 +1,152 @@
+#
+# File: src/core/conversation_store.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from contextlib import closing
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS turns (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL REFERENCES sessions(id),
+    role TEXT NOT NULL,
+    content TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_turns_session ON turns(session_id, id);
+CREATE INDEX IF NOT EXISTS idx_turns_created ON turns(created_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions(started_at);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS turns_fts USING fts5(content, content='turns', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS turns_fts_insert AFTER INSERT ON turns BEGIN
+    INSERT INTO turns_fts(rowid, content) VALUES (new.id, new.content);
+END;
+"""
+
+_STOP = object()
+# Role of the app's own instructions that start a proactive session: sent as a user message, never shown as one.
+PROMPT_ROLE = 'prompt'
+
+class ConversationStore:
+    """
+    SQLite (WAL) record of every session and turn. Writes are queued and
+    committed in batches by a background thread so callers never wait on disk;
+    reads open their own connection and can run alongside the writer.
+    """
+    def __init__(self, database_path="data/conversations.db", batch_size=50, batch_delay_seconds=0.25):
+        self.logger = logging.getLogger("technical")
+        self.database_path = database_path
+        self.batch_size = batch_size
+        self.batch_delay_seconds = batch_delay_seconds
+        self.write_queue = queue.Queue()
+        directory = os.path.dirname(database_path)
+        if directory: os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            try:
+                connection.executescript(FTS_SCHEMA); self.has_fts = True
+            except sqlite3.OperationalError as e:
+                # Some SQLite builds ship without FTS5; fall back to LIKE search.
+                self.logger.warning(f"SQLite FTS5 unavailable, using slower LIKE search: {e}"); self.has_fts = False
+        self.writer_thread = threading.Thread(target=self._writer_loop, name="ConversationStoreWriter", daemon=True)
+        self.writer_thread.start()
+        self.logger.info(f"Conversation store opened at {database_path}.")
+
+    @classmethod
+    def from_settings(cls, storage_settings):
+        storage_settings = storage_settings or {}
+        if not storage_settings.get('enabled', True): return None
+        try:
+            return cls(database_path=storage_settings.get('database_path', 'data/conversations.db'))
+        except (sqlite3.Error, OSError) as e:
+            logging.getLogger("technical").error(f"Could not open conversation store: {e}")
+            return None
+
+    def _connect(self):
+        connection = sqlite3.connect(self.database_path, timeout=5)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    # --- Writes (non-blocking) ---
+    def start_session(self, kind):
+        session_id = uuid.uuid4().hex
+        self.write_queue.put(("INSERT INTO sessions (id, kind, started_at) VALUES (?, ?, ?)", (session_id, kind, time.time())))
+        return session_id
+
+    def add_turn(self, session_id, role, content):
+        self.write_queue.put(("INSERT INTO turns (session_id, role, content, created_at) VALUES (?, ?, ?, ?)",
+                              (session_id, role, content, time.time())))
+
+    def flush(self):
+        """Blocks until every queued write is committed."""
+        self.write_queue.join()
+
+    def close(self):
+        self.write_queue.put(_STOP); self.writer_thread.join(timeout=5)
+
+    def _writer_loop(self):
+        connection = self._connect()
+        while True:
+            batch = [self.write_queue.get()]
+            # Collect whatever else arrives shortly so one transaction covers a burst of turns.
+            deadline = time.monotonic() + self.batch_delay_seconds
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                try: batch.append(self.write_queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty: break
+            writes = [item for item in batch if item is not _STOP]
+            try:
+                with connection:
+                    for statement, params in writes: connection.execute(statement, params)
+            except sqlite3.Error as e:
+                self.logger.error(f"Conversation store write failed ({len(writes)} rows lost): {e}")
+            for _ in batch: self.write_queue.task_done()
+            if len(writes) != len(batch): break
+        connection.close()
+
+    # --- Reads ---
+    def search(self, query, limit=20):
+        """Full-text search over turn content, best matches first."""
+        if not query.strip(): return [] # an empty MATCH is an FTS5 syntax error
+        with closing(self._connect()) as connection:
+            if self.has_fts:
+                # Quote each term so user input can't be parsed as FTS5 query syntax.
+                fts_query = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+                rows = connection.execute(
+                    "SELECT t.session_id, t.role, t.created_at, snippet(turns_fts, 0, '[', ']', '…', 12) "
+                    "FROM turns_fts JOIN turns t ON t.id = turns_fts.rowid "
+                    "WHERE turns_fts MATCH ? AND t.role != ? ORDER BY rank LIMIT ?", (fts_query, PROMPT_ROLE, limit)).fetchall()
+            else:
+                rows = connection.execute(
+                    "SELECT session_id, role, created_at, content FROM turns WHERE content LIKE ? AND role != ? "
+                    "ORDER BY created_at DESC LIMIT ?", (f"%{query}%", PROMPT_ROLE, limit)).fetchall()
+        return [{'session_id': r[0], 'role': r[1], 'created_at': r[2], 'snippet': r[3]} for r in rows]
+
+    def recent_sessions(self, limit=20, since=None):
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT s.id, s.kind, s.started_at, COUNT(t.id) FROM sessions s "
+                "LEFT JOIN turns t ON t.session_id = s.id WHERE s.started_at >= ? "
+                "GROUP BY s.id ORDER BY s.started_at DESC LIMIT ?", (since or 0, limit)).fetchall()
+        return [{'session_id': r[0], 'kind': r[1], 'started_at': r[2], 'turns': r[3]} for r in rows]
+
+    def load_session(self, session_id):
+        """Returns the session's turns as chat messages, in order; proactive instructions keep their PROMPT_ROLE."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT role, content FROM turns WHERE session_id = ? ORDER BY id", (session_id,)).fetchall()
+        return [{'role': role, 'content': content} for role, content in rows]
@@ -0,0 +1,134 @@
+#
+# File: src/core/conversation_worker.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from src.core.metrics import metrics
+from src.services.audio_output import PROACTIVE_PRIORITY, USER_PRIORITY
+from src.services.speech_pipeline import SpeechPipeline
+import itertools
+import logging
+import threading
+import time
+
+class TurnHandle:
+    """
+    One request/response turn. Cancelling it aborts the provider stream at
+    once and drops any speech not yet played; a turn cancelled before the
+    worker picks it up is never sent at all.
+    """
+    _ids = itertools.count(1)
+
+    def __init__(self, kind, speak=False, cacheable=False):
+        self.turn_id = next(self._ids)
+        self.kind = kind # 'user' or 'proactive'
+        self.speak = speak; self.cacheable = cacheable
+        self.cancelled = threading.Event()
+        self.created_at = time.perf_counter()
+        self.cancel_callbacks = []
+        self.lock = threading.Lock()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set()
+
+    def cancel(self):
+        with self.lock:
+            if self.cancelled.is_set(): return
+            self.cancelled.set(); callbacks = list(self.cancel_callbacks)
+        for callback in callbacks: callback()
+
+    def on_cancel(self, callback):
+        with self.lock:
+            if not self.cancelled.is_set():
+                self.cancel_callbacks.append(callback); return
+        callback()
+
+class ConversationWorker(QObject):
+    """
+    Owns the blocking provider calls for a conversational turn (LLM round trip
+    and speech). Lives on its own QThread; results go back to CoreService via signals.
+    """
+    response_delta = pyqtSignal(int, str); response_ready = pyqtSignal(int, str)
+    response_interrupted = pyqtSignal(int, str, str) # turn id, the text before the failure, error message
+    speech_finished = pyqtSignal(int, bool); turn_finished = pyqtSignal(int)
+    services_rebuilt = pyqtSignal(list)
+
+    def __init__(self, core_service):
+        super().__init__()
+        self.core_service = core_service
+        self.logger = logging.getLogger("technical")
+
+    @pyqtSlot(list, object)
+    def run_turn(self, messages_to_send, turn):
+        if turn.is_cancelled():
+            self.logger.info(f"Turn {turn.turn_id} was superseded before it started; not sent.")
+            self.turn_finished.emit(turn.turn_id); return
+        ai_provider = self.core_service.ai_provider; tts_provider = self.core_service.tts_provider
+        response_cache = self.core_service.response_cache if turn.cacheable else None
+        pipeline = None
+        if turn.speak and tts_provider.is_available():
+            # Speech starts with the first complete sentence instead of after the whole reply.
+            playback = self.core_service.settings.get('voice', {}).get('playback', {})
+            if turn.kind == 'user': priority, max_wait = USER_PRIORITY, playback.get('user_max_wait_seconds', 60)
+            else: priority, max_wait = PROACTIVE_PRIORITY, playback.get('proactive_max_wait_seconds', 15)
+            pipeline = SpeechPipeline(tts_provider, self.core_service.audio_output, turn_id=turn.turn_id,
+                                      priority=priority, max_wait_seconds=max_wait).start()
+            turn.on_cancel(pipeline.cancel)
+        elif turn.speak:
+            self.logger.warning(f"TTS provider '{tts_provider.provider}' not available or configured correctly. Skipping speech.")
+        cached_response = response_cache.get(messages_to_send) if response_cache else None
+        if cached_response is not None:
+            self.logger.info(f"Response cache hit; skipping LLM call. Stats: {response_cache.stats()}")
+            deltas = iter([cached_response])
+        else:
+            deltas = ai_provider.stream_response(messages_to_send)
+            # Closes the connection from the cancelling thread, so a superseded turn doesn't hold this thread until its next token.
+            turn.on_cancel(deltas.abort)
+        chunks = []; started_at = time.perf_counter()
+        for delta in deltas:
+            if turn.is_cancelled(): break
+            if not chunks: metrics.observe('llm_first_token', time.perf_counter() - started_at, turn.turn_id)
+            chunks.append(delta); self.response_delta.emit(turn.turn_id, delta)
+            if pipeline: pipeline.feed(delta)
+        if hasattr(deltas, 'close'): deltas.close() # Closes the HTTP stream so the backend stops generating.
+        if turn.is_cancelled():
+            self.logger.info(f"Turn {turn.turn_id} cancelled after {sum(len(c) for c in chunks)} chars.")
+            self.turn_finished.emit(turn.turn_id); return
+        metrics.observe('llm_total', time.perf_counter() - started_at, turn.turn_id)
+        ai_response = "".join(chunks).strip()
+        if response_cache and cached_response is None and deltas.error is None:
+            response_cache.put(messages_to_send, ai_response)
+        if getattr(deltas, 'interrupted', False): self.response_interrupted.emit(turn.turn_id, ai_response, deltas.error_message)
+        else: self.response_ready.emit(turn.turn_id, ai_response)
+        if pipeline:
+            pipeline.finish()
+            with metrics.span('speech_tail', turn.turn_id): success = pipeline.wait()
+            if not turn.is_cancelled(): self.speech_finished.emit(turn.turn_id, success)
+        self.turn_finished.emit(turn.turn_id)
+
+    @pyqtSlot(list)
+    def rebuild_services(self, service_names):
+        # Runs between turns on this thread, so a turn never sees a half-built provider.
+        for name in service_names:
+            setattr(self.core_service, f"{name}_provider", self.core_service.build_service(name))
+        self.services_rebuilt.emit(service_names)
+
+class VoiceInputWorker(QObject):
+    """Runs click-to-talk capture and transcription off the GUI thread."""
+    transcription_ready = pyqtSignal(object); stt_rebuilt = pyqtSignal()
+
+    def __init__(self, core_service):
+        super().__init__()
+        self.core_service = core_service
+
+    @pyqtSlot()
+    def listen(self):
+        self.transcription_ready.emit(self.core_service.stt_provider.listen_on_demand())
+
+    @pyqtSlot()
+    def rebuild_stt(self):
+        # Opening and calibrating the microphone blocks for about a second.
+        self.core_service.stt_provider = self.core_service.build_service('stt')
+        self.stt_rebuilt.emit()
@@ -0,0 +1,123 @@
+#
+# File: src/core/history_manager.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from collections import deque
+import logging
+import threading
+
+SUMMARY_INSTRUCTIONS = ("Summarize the conversation below for your own memory. Keep facts, names, decisions and "
+                        "open questions the user may come back to. Be brief; write plain sentences, no preamble.")
+
+def estimate_tokens(text):
+    """Cheap local token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+def estimate_message_tokens(message):
+    return estimate_tokens(message.get('content', '')) + 4 # role + framing overhead per message
+
+class HistoryManager:
+    """
+    Keeps the prompt for a conversation under a token budget. The last
+    keep_last_turns exchanges are sent verbatim; older ones are compacted into
+    a running summary by a background summarizer call.
+    """
+    def __init__(self, token_budget=3000, keep_last_turns=6, summarizer=None):
+        self.logger = logging.getLogger("technical")
+        self.token_budget = token_budget
+        self.keep_last_turns = keep_last_turns
+        self.summarizer = summarizer # callable(messages) -> summary text or None
+        self.summarize_enabled = True
+        self.lock = threading.Lock()
+        self.turns = []          # verbatim messages still eligible for the prompt
+        self.pending = []        # older messages waiting to be folded into the summary
+        self.summary = ""
+        self.message_count = 0   # messages added since the conversation started
+        self.generation = 0      # bumped on clear() so stale summaries are discarded
+        self.is_summarizing = False
+        self.prompt_tokens_per_turn = deque(maxlen=200)
+
+    def configure(self, conversation_settings):
+        conversation_settings = conversation_settings or {}
+        self.token_budget = conversation_settings.get('token_budget', 3000)
+        self.keep_last_turns = conversation_settings.get('keep_last_turns', 6)
+        self.summarize_enabled = conversation_settings.get('summarize', True)
+        if self.summarize_enabled: self._maybe_summarize() # catch up on turns left pending while it was off
+
+    def clear(self):
+        with self.lock:
+            self.turns = []; self.pending = []; self.summary = ""
+            self.message_count = 0; self.generation += 1
+
+    def is_empty(self):
+        return self.message_count == 0
+
+    def add(self, role, content):
+        with self.lock:
+            self.turns.append({'role': role, 'content': content}); self.message_count += 1
+            # A turn is a user message plus the reply, so keep twice as many messages verbatim.
+            overflow = len(self.turns) - self.keep_last_turns * 2
+            if overflow > 0:
+                self.pending.extend(self.turns[:overflow]); self.turns = self.turns[overflow:]
+        self._maybe_summarize()
+
+    def load(self, messages):
+        """Replaces the conversation with previously stored messages."""
+        self.clear()
+        for message in messages: self.add(message['role'], message['content'])
+
+    def build_messages(self, system_messages):
+        """Returns system_messages + summary + as many recent turns as fit in the budget."""
+        with self.lock:
+            prefix = list(system_messages)
+            if self.summary:
+                prefix.append({'role': 'system', 'content': f"Summary of the earlier conversation: {self.summary}"})
+            used = sum(estimate_message_tokens(m) for m in prefix)
+            # Until the summarizer catches up, pending messages ride along verbatim if there's room.
+            candidates = self.pending + self.turns
+            kept = []
+            for message in reversed(candidates):
+                cost = estimate_message_tokens(message)
+                if kept and used + cost > self.token_budget: break
+                kept.append(message); used += cost
+            kept.reverse()
+            self.prompt_tokens_per_turn.append(used)
+        dropped = len(candidates) - len(kept)
+        self.logger.info(f"Prompt assembled: ~{used} tokens (budget {self.token_budget}), {len(kept)} messages verbatim"
+                         + (f", {dropped} left to the summary" if dropped else "") + ".")
+        return prefix + kept
+
+    def metrics(self):
+        with self.lock:
+            sent = list(self.prompt_tokens_per_turn)
+            return {'last_prompt_tokens': sent[-1] if sent else 0,
+                    'avg_prompt_tokens': sum(sent) / len(sent) if sent else 0,
+                    'max_prompt_tokens': max(sent) if sent else 0,
+                    'turns_measured': len(sent), 'verbatim_messages': len(self.turns),
+                    'pending_messages': len(self.pending), 'summary_tokens': estimate_tokens(self.summary)}
+
+    def _maybe_summarize(self):
+        with self.lock:
+            if not self.summarizer or not self.summarize_enabled or not self.pending or self.is_summarizing: return
+            self.is_summarizing = True
+            batch = list(self.pending); previous_summary = self.summary; generation = self.generation
+        threading.Thread(target=self._summarize, args=(batch, previous_summary, generation), name="HistorySummarizer", daemon=True).start()
+
+    def _summarize(self, batch, previous_summary, generation):
+        transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in batch)
+        if previous_summary: transcript = f"Earlier summary: {previous_summary}\n\n{transcript}"
+        summary = None
+        try:
+            summary = self.summarizer([{'role': 'system', 'content': SUMMARY_INSTRUCTIONS},
+                                       {'role': 'user', 'content': transcript}])
+        except Exception as e:
+            self.logger.error(f"History summarization failed: {e}")
+        with self.lock:
+            self.is_summarizing = False
+            if summary and generation == self.generation:
+                self.summary = summary.strip(); self.pending = self.pending[len(batch):]
+                self.logger.info(f"Compacted {len(batch)} messages into summary (~{estimate_tokens(self.summary)} tokens).")
+        # More messages may have aged out while we were busy.
+        if summary and generation == self.generation: self._maybe_summarize()
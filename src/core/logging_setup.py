@@ -0,0 +1,60 @@
+#
+# File: src/core/logging_setup.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import json
+import logging
+import os
+import queue
+
+class TruncatingFilter(logging.Filter):
+    """Caps message size so a huge prompt or response costs a bounded amount to log."""
+    def __init__(self, max_chars):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record):
+        message = record.getMessage()
+        if self.max_chars and len(message) > self.max_chars:
+            record.msg = f"{message[:self.max_chars]}… [truncated {len(message) - self.max_chars} chars]"; record.args = None
+        return True
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {'time': self.formatTime(record), 'level': record.levelname, 'logger': record.name,
+                 'module': record.module, 'thread': record.threadName, 'message': record.getMessage()}
+        if record.exc_info: entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def setup_logging(log_settings=None, log_dir="logs"):
+    """
+    Routes the 'technical' and 'conversation' loggers through a queue so the
+    calling thread only enqueues; a listener thread does the file I/O into
+    size-capped rotating files. Returns the listener; stop() it on exit to flush.
+    """
+    log_settings = log_settings or {}
+    os.makedirs(log_dir, exist_ok=True)
+    max_bytes = int(log_settings.get('max_megabytes', 5) * 1024 * 1024)
+    backup_count = log_settings.get('backup_count', 3)
+    json_lines = log_settings.get('json_lines', False)
+    extension = "jsonl" if json_lines else "log"
+    formats = {"technical": '%(asctime)s - %(levelname)s - %(module)s - %(message)s', "conversation": '%(asctime)s - %(message)s'}
+
+    log_queue = queue.SimpleQueue(); handlers = []
+    for name, text_format in formats.items():
+        file_handler = RotatingFileHandler(os.path.join(log_dir, f"{name}.{extension}"), maxBytes=max_bytes,
+                                           backupCount=backup_count, encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter() if json_lines else logging.Formatter(text_format))
+        file_handler.addFilter(logging.Filter(name)) # One listener serves both loggers; route by name.
+        handlers.append(file_handler)
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.addFilter(TruncatingFilter(log_settings.get('max_message_chars', 2000)))
+        logger = logging.getLogger(name); logger.setLevel(logging.INFO)
+        logger.handlers.clear(); logger.addHandler(queue_handler); logger.propagate = False
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,168 @@
+#
+# File: src/core/metrics.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+# Upper bounds in seconds; stages range from sub-millisecond UI work to multi-second LLM replies.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    """Cumulative-bucket latency histogram, Prometheus style."""
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # the last slot is +Inf
+        self.count = 0; self.total = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1; self.total += seconds
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (an estimate, like histogram_quantile)."""
+        if not self.count: return None
+        rank = q * self.count; seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank: return bound
+        return float('inf')
+
+class _Span:
+    __slots__ = ('registry', 'stage', 'turn_id', 'started_at')
+
+    def __init__(self, registry, stage, turn_id):
+        self.registry = registry; self.stage = stage; self.turn_id = turn_id
+
+    def __enter__(self):
+        self.started_at = time.perf_counter(); return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.registry.observe(self.stage, time.perf_counter() - self.started_at, self.turn_id)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, exc_type, exc, traceback): return False
+
+_NULL_SPAN = _NullSpan()
+
+class Metrics:
+    """
+    In-process per-stage latency histograms. span(stage, turn_id) times a
+    block; observations carrying a turn ID are also kept in a short ring of
+    recent turns, so one slow turn can be broken down stage by stage.
+    Disabled (the default) it hands out a shared no-op span and records nothing.
+    Optionally serves /metrics in Prometheus text format on localhost and
+    writes a JSON snapshot every few seconds.
+    """
+    def __init__(self):
+        self.logger = logging.getLogger("technical")
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.recent_turns = deque(maxlen=50) # (turn_id, {stage: seconds})
+        self.server = None; self.server_port = None
+        self.snapshot_path = None; self.snapshot_interval = 60
+        self.snapshot_stop = threading.Event(); self.snapshot_thread = None
+
+    def configure(self, metrics_settings):
+        metrics_settings = metrics_settings or {}
+        self.stop()
+        self.enabled = metrics_settings.get('enabled', False)
+        if not self.enabled: return
+        port = metrics_settings.get('prometheus_port')
+        if port: self._start_server(port)
+        self.snapshot_path = metrics_settings.get('snapshot_path') or None
+        self.snapshot_interval = max(1, metrics_settings.get('snapshot_interval_seconds', 60))
+        if self.snapshot_path:
+            self.snapshot_stop = threading.Event()
+            self.snapshot_thread = threading.Thread(target=self._snapshot_loop, args=(self.snapshot_stop,), name="MetricsSnapshot", daemon=True)
+            self.snapshot_thread.start()
+        self.logger.info(f"Metrics enabled (endpoint: {f'http://127.0.0.1:{port}/metrics' if port else 'off'}, snapshots: {self.snapshot_path or 'off'}).")
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown(); self.server.server_close(); self.server = None
+        if self.snapshot_thread:
+            self.snapshot_stop.set(); self.snapshot_thread.join(2); self.snapshot_thread = None
+            self.write_snapshot() # keep the final numbers
+
+    def span(self, stage, turn_id=None):
+        return _Span(self, stage, turn_id) if self.enabled else _NULL_SPAN
+
+    def observe(self, stage, seconds, turn_id=None):
+        if not self.enabled: return
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None: histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+            if turn_id is not None:
+                turn = next((stages for tid, stages in self.recent_turns if tid == turn_id), None)
+                if turn is None: turn = {}; self.recent_turns.append((turn_id, turn))
+                turn[stage] = turn.get(stage, 0.0) + seconds # repeated stages (per sentence, per delta) add up
+
+    def snapshot(self):
+        with self.lock:
+            stages = {stage: {'count': h.count, 'sum_seconds': h.total, 'p50_seconds': h.quantile(0.5),
+                              'p95_seconds': h.quantile(0.95), 'p99_seconds': h.quantile(0.99)}
+                      for stage, h in self.histograms.items()}
+            turns = [{'turn_id': turn_id, 'stages': dict(stages_)} for turn_id, stages_ in self.recent_turns]
+        return {'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"), 'stages': stages, 'recent_turns': turns}
+
+    def prometheus_text(self):
+        lines = ["# HELP companion_stage_seconds Time spent per pipeline stage.", "# TYPE companion_stage_seconds histogram"]
+        with self.lock:
+            for stage, h in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(h.buckets + (float('inf'),), h.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float('inf') else repr(bound)
+                    lines.append(f'companion_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'companion_stage_seconds_sum{{stage="{stage}"}} {h.total}')
+                lines.append(f'companion_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self):
+        if not self.snapshot_path: return
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding="utf-8") as f: json.dump(self.snapshot(), f, indent=2)
+            os.replace(temp_path, self.snapshot_path)
+        except OSError as e:
+            self.logger.warning(f"Could not write metrics snapshot: {e}")
+
+    def _snapshot_loop(self, stop):
+        while not stop.wait(self.snapshot_interval): self.write_snapshot()
+
+    def _start_server(self, port):
+        registry = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics': self.send_error(404); return
+                body = registry.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4'); self.send_header('Content-Length', str(len(body)))
+                self.end_headers(); self.wfile.write(body)
+            def log_message(self, format, *args):
+                pass
+        try:
+            # Bound to loopback only; the endpoint is for local dashboards, not the network.
+            self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler); self.server.daemon_threads = True
+            threading.Thread(target=self.server.serve_forever, name="MetricsEndpoint", daemon=True).start()
+        except OSError as e:
+            self.logger.error(f"Could not start metrics endpoint on port {port}: {e}"); self.server = None
+
+metrics = Metrics()
@@ -0,0 +1,121 @@
+#
+# File: src/core/proactive_scheduler.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from collections import deque
+import ctypes
+import logging
+import random
+import sys
+import time
+
+class ProactiveScheduler(QObject):
+    """
+    Decides when a proactive event is worth an LLM call. Every tick it skips
+    the event if a user turn is in progress, if nothing changed since the
+    last event (same window, no interaction), if the user is idle (where the
+    OS reports input idle time), or if the hourly cap is reached. Each skip
+    doubles the next delay (with jitter) up to a ceiling; firing resets it.
+    """
+    proactive_due = pyqtSignal()
+
+    def __init__(self, context_provider, parent=None, is_busy=None):
+        super().__init__(parent)
+        self.logger = logging.getLogger("technical")
+        self.context_provider = context_provider # callable() -> current window title or None
+        self.is_busy = is_busy or (lambda: False) # callable() -> True while the user is mid-conversation
+        self.timer = QTimer(self); self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._tick)
+        self.enabled = False
+        self.frequency_seconds = 60; self.inactivity_timeout_seconds = 180
+        self.max_per_hour = 20; self.max_backoff_seconds = 1800; self.jitter = 0.2
+        self.consecutive_skips = 0
+        self.last_activity_at = time.monotonic(); self.activity_since_last_event = True
+        self.last_event_context = None
+        self.fired_at = deque()
+        self.counters = {'fired': 0, 'suppressed_idle': 0, 'suppressed_unchanged': 0, 'suppressed_rate_limited': 0, 'suppressed_busy': 0}
+
+    def configure(self, proactivity_settings, is_on=True):
+        proactivity_settings = proactivity_settings or {}
+        self.frequency_seconds = max(1, proactivity_settings.get('frequency_seconds', 60))
+        self.inactivity_timeout_seconds = proactivity_settings.get('inactivity_timeout_seconds', 180)
+        self.max_per_hour = proactivity_settings.get('max_events_per_hour', 20)
+        self.max_backoff_seconds = proactivity_settings.get('max_backoff_seconds', 1800)
+        self.enabled = is_on and proactivity_settings.get('enabled', False)
+        self.consecutive_skips = 0
+        if self.enabled:
+            self._schedule_next()
+            self.logger.info(f"Proactive scheduler (re)started. Base interval {self.frequency_seconds}s, idle after {self.inactivity_timeout_seconds}s, max {self.max_per_hour}/hour.")
+        else:
+            self.timer.stop(); self.logger.info("Proactive scheduler stopped.")
+
+    def stop(self):
+        self.enabled = False; self.timer.stop()
+
+    def note_user_activity(self):
+        self.last_activity_at = time.monotonic(); self.activity_since_last_event = True
+        if self.consecutive_skips and self.enabled:
+            # The user is back; drop the backoff so the next event comes at the normal pace.
+            self.consecutive_skips = 0; self._schedule_next()
+
+    def record_suppressed(self, reason):
+        self.counters[f"suppressed_{reason}"] = self.counters.get(f"suppressed_{reason}", 0) + 1
+
+    def stats(self):
+        return dict(self.counters, current_delay_seconds=self._base_delay())
+
+    def _tick(self):
+        if not self.enabled: return
+        reason = self._suppression_reason()
+        if reason:
+            self.consecutive_skips += 1; self.record_suppressed(reason)
+            self.logger.info(f"Proactive event skipped ({reason}); next check in ~{self._base_delay():.0f}s. Stats: {self.counters}")
+        else:
+            self.consecutive_skips = 0
+            self.fired_at.append(time.monotonic()); self.counters['fired'] += 1
+            self.activity_since_last_event = False
+            self.proactive_due.emit()
+        self._schedule_next()
+
+    def _suppression_reason(self):
+        now = time.monotonic()
+        # Checked first, so a skipped tick neither uses up the hourly cap nor consumes a window change.
+        if self.is_busy(): return 'busy'
+        context = self.context_provider()
+        if context != self.last_event_context:
+            # Switching windows counts as activity, so check it before the idle gate.
+            self.last_event_context = context; self.activity_since_last_event = True; self.last_activity_at = now
+        elif not self.activity_since_last_event and self._base_delay() < self.max_backoff_seconds:
+            # Once backed off to the ceiling, let an event through even if nothing changed.
+            return 'unchanged'
+        idle_seconds = self._idle_seconds(now)
+        if idle_seconds is not None and idle_seconds > self.inactivity_timeout_seconds: return 'idle'
+        while self.fired_at and now - self.fired_at[0] > 3600: self.fired_at.popleft()
+        if self.max_per_hour and len(self.fired_at) >= self.max_per_hour: return 'rate_limited'
+        return None
+
+    def _idle_seconds(self, now):
+        """Seconds without desktop input, or None where the OS doesn't say."""
+        system_idle = _system_idle_seconds()
+        # Without OS input tracking, quiet work looks exactly like being away; the unchanged check and backoff still apply.
+        if system_idle is None: return None
+        return min(system_idle, now - self.last_activity_at)
+
+    def _base_delay(self):
+        return min(self.frequency_seconds * (2 ** self.consecutive_skips), max(self.frequency_seconds, self.max_backoff_seconds))
+
+    def _schedule_next(self):
+        delay = self._base_delay() * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self.timer.start(int(delay * 1000))
+
+def _system_idle_seconds():
+    """Seconds since the last keyboard/mouse input anywhere on the desktop, where the OS tells us."""
+    if sys.platform != 'win32': return None
+    class LASTINPUTINFO(ctypes.Structure):
+        _fields_ = [('cbSize', ctypes.c_uint), ('dwTime', ctypes.c_uint)]
+    info = LASTINPUTINFO(); info.cbSize = ctypes.sizeof(LASTINPUTINFO)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)): return None
+    return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000.0
@@ -0,0 +1,68 @@
+#
+# File: src/core/prompt_builder.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.core.history_manager import estimate_message_tokens
+import datetime
+import hashlib
+import json
+import logging
+
+def message_hash(message):
+    return hashlib.sha256(json.dumps([message.get('role'), message.get('content', '')], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class PromptBuilder:
+    """
+    Assembles the message list so that it starts with a byte-stable prefix
+    (the personality prompt, then history) and ends with one trailing system
+    message holding everything volatile: the time, rounded down to a coarse
+    granularity, and the window context. Providers that cache prompt prefixes
+    (OpenAI prompt caching, Ollama's KV cache) can then reuse everything up
+    to the newest turn. Tracks how much of each prompt repeats the previous one.
+    """
+    def __init__(self, time_granularity_minutes=15):
+        self.logger = logging.getLogger("technical")
+        self.time_granularity_minutes = time_granularity_minutes
+        self.last_message_hashes = []
+        self.counters = {'prompts': 0, 'prefix_stable': 0, 'prefix_changed': 0, 'shared_tokens': 0, 'total_tokens': 0}
+
+    def configure(self, conversation_settings):
+        conversation_settings = conversation_settings or {}
+        self.time_granularity_minutes = max(1, conversation_settings.get('context_time_granularity_minutes', 15))
+
+    def coarse_time(self, now=None):
+        now = now or datetime.datetime.now()
+        minute = now.minute - now.minute % self.time_granularity_minutes if self.time_granularity_minutes < 60 else 0
+        return now.replace(minute=minute, second=0, microsecond=0).strftime("%Y-%m-%d %H:%M")
+
+    def build(self, history, system_prompt, window_context=None):
+        """Returns [stable system prompt] + history + [volatile context]."""
+        messages = history.build_messages([{'role': 'system', 'content': system_prompt}])
+        context_lines = [f"Current date and time is: {self.coarse_time()}."]
+        if window_context: context_lines.append(window_context)
+        self._record(messages)
+        return messages + [{'role': 'system', 'content': "\n".join(context_lines)}]
+
+    def _record(self, messages):
+        # Only the part before the volatile tail is compared; the tail is expected to change.
+        hashes = [message_hash(m) for m in messages]
+        shared = 0
+        for previous, current in zip(self.last_message_hashes, hashes):
+            if previous != current: break
+            shared += 1
+        shared_tokens = sum(estimate_message_tokens(m) for m in messages[:shared])
+        total_tokens = sum(estimate_message_tokens(m) for m in messages)
+        stable = bool(self.last_message_hashes) and shared > 0
+        self.counters['prompts'] += 1
+        if self.last_message_hashes: self.counters['prefix_stable' if stable else 'prefix_changed'] += 1
+        self.counters['shared_tokens'] += shared_tokens; self.counters['total_tokens'] += total_tokens
+        self.last_message_hashes = hashes
+        self.logger.info(f"Prompt prefix {hashes[0][:12]} {'stable' if stable else 'new'}; "
+                         f"{shared}/{len(messages)} messages (~{shared_tokens}/{total_tokens} tokens) shared with the previous prompt.")
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats['shared_token_ratio'] = stats['shared_tokens'] / stats['total_tokens'] if stats['total_tokens'] else 0.0
+        return stats
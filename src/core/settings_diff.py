@@ -0,0 +1,29 @@
+#
+# File: src/core/settings_diff.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+def diff_settings(old, new, prefix=""):
+    """
+    Returns the set of dotted key paths whose values differ between two
+    settings dicts, e.g. {'ai.ollama_settings.model', 'proactivity.enabled'}.
+    A section that only exists on one side is reported as a single path.
+    """
+    changed = set()
+    for key in set(old) | set(new):
+        path = f"{prefix}{key}"
+        old_value = old.get(key); new_value = new.get(key)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changed |= diff_settings(old_value, new_value, prefix=f"{path}.")
+        elif key not in old or key not in new or old_value != new_value:
+            changed.add(path)
+    return changed
+
+def touches(changed_keys, dependency_keys):
+    """True if any changed path is, contains, or lies under one of dependency_keys."""
+    for changed in changed_keys:
+        for dependency in dependency_keys:
+            if changed == dependency or changed.startswith(dependency + ".") or dependency.startswith(changed + "."):
+                return True
+    return False
@@ -19,22 +19,51 @@ def get_default_config():
             },
             "ollama_settings": {
                 "host": "http://localhost:11434",
-                "model": "llama3"
+                "model": "llama3",
+                "keep_alive": "30m"
             },
-            "elevenlabs_api_key": "YOUR_ELEVENLABS_API_KEY_HERE"
+            "elevenlabs_api_key": "YOUR_ELEVENLABS_API_KEY_HERE",
+            "fallback": {
+                "enabled": False,
+                "order": ["ollama", "openai"],
+                "hedge_percentile": 90,
+                "hedge_default_ms": 3000,
+                "hedge_min_ms": 500,
+                "hedge_max_ms": 10000
+            }
         },
         "proactivity": {
             "enabled": True,
             "frequency_seconds": 60,
-            "inactivity_timeout_seconds": 180
+            "inactivity_timeout_seconds": 180,
+            "max_events_per_hour": 20,
+            "max_backoff_seconds": 1800
         },
         "voice": {
             "enabled": True,
-            "voice_id": "21m00Tcm4TlvDq8ikWAM"
+            "voice_id": "21m00Tcm4TlvDq8ikWAM",
+            "audio_cache": {
+                "enabled": True,
+                "directory": "cache/tts",
+                "max_megabytes": 100
+            },
+            "audio_sink": {
+                "enabled": True,
+                "sample_rate": 22050,
+                "frames_per_buffer": 1024,
+                "buffer_periods": 8,
+                "idle_close_seconds": 10
+            },
+            "playback": {
+                "barge_in": True,
+                "user_max_wait_seconds": 60,
+                "proactive_max_wait_seconds": 15
+            }
         },
         "ui": {
             "theme": "dark",
-            "always_on_top": True
+            "always_on_top": True,
+            "chat_scrollback": 200
         },
         "ai_personality": {
             "system_prompt": "You are a helpful and concise desktop assistant named Companion."
@@ -42,9 +71,54 @@ def get_default_config():
         "context_awareness": {
             "enabled": True
         },
+        "conversation": {
+            "token_budget": 3000,
+            "keep_last_turns": 6,
+            "summarize": True,
+            "coalesce_window_ms": 600,
+            "context_time_granularity_minutes": 15
+        },
         "audio_input": {
             "mic_device_index": None,
-            "always_on_listening": False
+            "always_on_listening": False,
+            "vad": {
+                "enabled": True,
+                "margin_db": 12.0,
+                "min_speech_ms": 210,
+                "hangover_ms": 240
+            },
+            "transcription": {
+                "workers": 2,
+                "max_pending": 4,
+                "overflow_policy": "merge"
+            }
+        },
+        "network": {
+            "connect_timeout_seconds": 5,
+            "read_timeout_seconds": 60,
+            "pool_maxsize": 4
+        },
+        "logging": {
+            "max_megabytes": 5,
+            "backup_count": 3,
+            "json_lines": False,
+            "max_message_chars": 2000
+        },
+        "storage": {
+            "enabled": True,
+            "database_path": "data/conversations.db"
+        },
+        "metrics": {
+            "enabled": False,
+            "prometheus_port": None,
+            "snapshot_path": "logs/metrics.json",
+            "snapshot_interval_seconds": 60
+        },
+        "response_cache": {
+            "enabled": False,
+            "max_entries": 64,
+            "ttl_seconds": 900,
+            "persist_path": "cache/responses.json"
         }
     }
 
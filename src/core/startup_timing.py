@@ -0,0 +1,62 @@
+#
+# File: src/core/startup_timing.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from contextlib import contextmanager
+import importlib
+import logging
+import sys
+import threading
+import time
+
+class StartupTimer:
+    """
+    Records how long each import and service initialization takes until the
+    app is fully up, then logs a one-off breakdown. Recording stops after
+    finish(), so later rebuilds and imports cost nothing extra.
+    """
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.entries = []    # (category, name, seconds, thread name)
+        self.milestones = [] # (name, seconds since start)
+        self.lock = threading.Lock()
+        self.finished = False
+
+    @contextmanager
+    def measure(self, category, name):
+        if self.finished:
+            yield; return
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.entries.append((category, name, time.perf_counter() - began, threading.current_thread().name))
+
+    def mark(self, name):
+        if self.finished: return
+        with self.lock: self.milestones.append((name, time.perf_counter() - self.started_at))
+
+    def finish(self):
+        if self.finished: return
+        self.mark("all services ready"); self.finished = True
+        logging.getLogger("technical").info(self.report())
+
+    def report(self):
+        with self.lock:
+            lines = ["Startup timing report:"]
+            for name, at in self.milestones: lines.append(f"  {at * 1000:8.1f} ms  reached: {name}")
+            for category, name, seconds, thread in sorted(self.entries, key=lambda e: -e[2]):
+                lines.append(f"  {seconds * 1000:8.1f} ms  {category:<6} {name} [{thread}]")
+            return "\n".join(lines)
+
+startup_timer = StartupTimer()
+
+def timed_import(module_name):
+    """Imports a module on first use, recording the cost in the startup report."""
+    module = sys.modules.get(module_name)
+    if module is not None: return module
+    with startup_timer.measure("import", module_name):
+        return importlib.import_module(module_name)
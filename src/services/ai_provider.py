@@ -4,67 +4,285 @@
 # ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
 #
 
-from openai import OpenAI
-import requests
+from src.core.metrics import metrics
+from src.services.backend_router import AbortSignal, BackendRouter
+from src.services.http_pool import http_pool
 import json
 import logging
+import socket
+import sys
+import threading
+import time
+
+def _is_requests_error(error, name):
+    # Only Ollama goes through requests; if it was never imported, no error can come from it.
+    requests = sys.modules.get('requests')
+    return requests is not None and isinstance(error, getattr(requests.exceptions, name))
+
+def _shut_down_response(response):
+    # Closing a response doesn't wake a read blocked on another thread; shutting its socket down does (urllib3 >= 2.3).
+    shutdown = getattr(response.raw, 'shutdown', None)
+    if shutdown: shutdown()
+    else: response.close()
+
+def _shut_down_openai_stream(stream):
+    network_stream = stream.response.extensions.get('network_stream')
+    sock = network_stream.get_extra_info('socket') if network_stream else None
+    if sock is not None: sock.shutdown(socket.SHUT_RDWR)
+    else: stream.close()
+
+# Readiness states reported while a local model is being loaded into memory.
+READY, WARMING, UNAVAILABLE = 'ready', 'warming', 'unavailable'
+
+class AIResponseError(RuntimeError):
+    """Raised by get_response when the call failed; the message is the short error description."""
+
+class ResponseStream:
+    """
+    The text deltas of one call. error is set once that call has failed, so
+    concurrent callers on the same provider (a turn and the history
+    summarizer) each see only their own outcome. A call that fails after
+    yielding text just ends, with interrupted set and the user-facing
+    error_message kept apart from the reply. abort() may be called from
+    any thread: it tears down the live connection, so a consumer blocked
+    waiting for the next token is released at once.
+    """
+    def __init__(self, make_deltas):
+        self.error = None; self.error_message = None; self.interrupted = False
+        self.abort_signal = AbortSignal()
+        self.deltas = make_deltas(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self.deltas)
+
+    @property
+    def aborted(self):
+        return self.abort_signal.is_set()
+
+    def close(self):
+        self.deltas.close()
+
+    def abort(self):
+        self.abort_signal.fire()
 
 class AIProvider:
+    # Settings this provider is built from; a change to any of them means a rebuild.
+    SETTINGS_KEYS = ('ai.provider', 'ai.openai_settings', 'ai.ollama_settings', 'ai.fallback', 'network')
+
     def __init__(self, ai_config):
         self.logger = logging.getLogger("technical")
         self.config = ai_config
         self.provider = self.config.get('provider', 'openai')
         self.openai_client = None
+        self.last_error = None # the most recent call's error, for display; decisions use ResponseStream.error
+        self.last_usage = None # prompt token accounting reported by the backend for the last call
+        self.usage_totals = {'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0}
+        self.readiness = READY
+
+        # With fallback enabled, every backend in the order is set up; otherwise just the chosen one.
+        fallback_settings = self.config.get('fallback', {})
+        self.backends = [self.provider]
+        if fallback_settings.get('enabled', False):
+            order = [name for name in fallback_settings.get('order', ['ollama', 'openai']) if name in ('openai', 'ollama')]
+            self.backends = [self.provider] + [name for name in order if name != self.provider]
 
-        if self.provider == 'openai':
+        if 'openai' in self.backends:
             api_key = self.config.get('openai_settings', {}).get('api_key')
             if not api_key or "MYAPIKEY" in api_key: # More robust placeholder check
                 self.logger.warning("OpenAI API key is missing or is a placeholder.")
+                if self.provider != 'openai': self.backends.remove('openai')
             else:
-                self.openai_client = OpenAI(api_key=api_key)
+                self.openai_client = http_pool.openai_client(api_key)
                 self.logger.info("AI Provider initialized for OpenAI.")
-        else:
+        if 'ollama' in self.backends:
             self.logger.info(f"AI Provider initialized for Ollama (model: {self.config.get('ollama_settings', {}).get('model')}).")
 
+        self.router = None
+        if len(self.backends) > 1:
+            self.router = BackendRouter.from_settings(self.backends, fallback_settings)
+            self.logger.info(f"AI fallback enabled; backend order: {', '.join(self.backends)}.")
+
+    def start_warm_up(self, on_readiness=None):
+        """
+        Loads the configured Ollama model in the background so the first real
+        request doesn't pay for it. on_readiness(state) is called from the
+        warm-up thread as the state changes. Remote providers are always ready.
+        """
+        if 'ollama' not in self.backends:
+            if on_readiness: on_readiness(READY)
+            return
+        self.readiness = WARMING
+        if on_readiness: on_readiness(WARMING)
+        threading.Thread(target=self._warm_up_ollama, args=(on_readiness,), name="OllamaWarmUp", daemon=True).start()
+
+    def _warm_up_ollama(self, on_readiness):
+        ollama_settings = self.config.get('ollama_settings', {})
+        host = ollama_settings.get('host', 'http://localhost:11434')
+        model = ollama_settings.get('model', 'llama3')
+        started_at = time.monotonic()
+        try:
+            # A generate call without a prompt just loads the model and applies keep_alive.
+            connect, read = http_pool.timeout
+            response = http_pool.session_for(host).post(
+                f"{host}/api/generate",
+                json={"model": model, "keep_alive": self._keep_alive()},
+                timeout=(connect, max(read, 300))
+            )
+            response.raise_for_status()
+            self.readiness = READY
+            self.logger.info(f"Ollama model '{model}' warmed up in {(time.monotonic() - started_at) * 1000:.0f} ms.")
+        except Exception as e:
+            self.readiness = UNAVAILABLE
+            self.logger.error(f"Ollama warm-up for '{model}' at {host} failed: {e}")
+        if on_readiness: on_readiness(self.readiness)
+
+    def _keep_alive(self):
+        return self.config.get('ollama_settings', {}).get('keep_alive', '30m')
+
     def get_response(self, message_history):
-        if self.provider == 'ollama':
-            return self._call_ollama(message_history)
-        elif self.openai_client:
-            return self._call_openai(message_history)
-        else:
+        """The whole response as text; raises AIResponseError if the call failed."""
+        with metrics.span('llm_get_response'):
+            stream = self.stream_response(message_history); text = "".join(stream).strip()
+        if stream.error: raise AIResponseError(stream.error)
+        return text
+
+    def stream_response(self, message_history):
+        """
+        Returns a ResponseStream yielding text deltas while the provider
+        generates them. A failure before any text is yielded as a user-facing
+        message; after text, the stream ends there. Either way it is recorded
+        in the stream's error. An aborted stream just ends.
+        """
+        return ResponseStream(lambda stream: self._stream_response(message_history, stream))
+
+    def _stream_response(self, message_history, stream):
+        self.last_error = None; self.last_usage = None
+        if self.provider == 'openai' and not self.openai_client and not self.router:
             self.logger.error("AI provider not configured or key is missing.")
-            return "AI provider not configured. Please check your settings."
+            stream.error = self.last_error = "not configured"
+            yield "AI provider not configured. Please check your settings."
+            return
+        produced_text = False; deltas = None
+        try:
+            if self.router:
+                deltas = self.router.stream(lambda name, abortable: self._open_backend(name, message_history, abortable),
+                                            abortable=stream.abort_signal.abortable)
+            else:
+                deltas = self._open_backend(self.provider, message_history, stream.abort_signal.abortable)
+            for delta in deltas:
+                produced_text = True; yield delta
+        except Exception as e:
+            if stream.aborted: return # the connection was torn down on purpose
+            stream.error = self.last_error = self._describe_error(e); stream.error_message = self._error_message(e)
+            # Appended to half a reply, the message would be read (and spoken) as part of it.
+            if produced_text: stream.interrupted = True
+            else: yield stream.error_message
+        finally:
+            if deltas is not None: deltas.close() # also when the consumer abandons the turn
+
+    def routing_stats(self):
+        return self.router.snapshot() if self.router else None
+
+    def _open_backend(self, name, message_history, abortable):
+        """
+        Streams from one backend; unlike stream_response, failures are raised.
+        The live connection is registered with abortable (an AbortSignal's),
+        so aborting shuts it down even while a read is blocked.
+        """
+        if name == 'ollama': return self._stream_ollama(message_history, abortable)
+        if not self.openai_client: raise RuntimeError("OpenAI is not configured")
+        return self._stream_openai(message_history, abortable)
+
+    def _describe_error(self, error):
+        host = self.config.get('ollama_settings', {}).get('host', 'http://localhost:11434')
+        if _is_requests_error(error, 'ConnectionError'):
+            self.logger.error(f"Ollama connection failed at {host}."); return "connection failed"
+        if _is_requests_error(error, 'Timeout'):
+            self.logger.error(f"Ollama timed out at {host} (timeouts: {http_pool.timeout})."); return "timeout"
+        self.logger.error(f"Error calling {getattr(error, 'backend', 'AI')} API: {error}")
+        return str(error)
+
+    def _error_message(self, error):
+        host = self.config.get('ollama_settings', {}).get('host', 'http://localhost:11434')
+        if _is_requests_error(error, 'ConnectionError'): return f"Ollama connection failed. Is Ollama running at {host}?"
+        if _is_requests_error(error, 'Timeout'): return f"Ollama at {host} took too long to respond."
+        return f"I encountered an error with the {getattr(error, 'backend', 'AI')} API."
 
-    def _call_openai(self, message_history):
-        self.logger.info(f"Sending message history to OpenAI ({len(message_history)} messages)...")
+    def _stream_openai(self, message_history, abortable):
+        self.logger.info(f"Streaming message history to OpenAI ({len(message_history)} messages)...")
         try:
-            response = self.openai_client.chat.completions.create(
+            stream = self.openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
-                messages=message_history
+                messages=message_history,
+                stream=True,
+                stream_options={"include_usage": True}
             )
-            return response.choices[0].message.content.strip()
+            try:
+                with abortable(lambda: _shut_down_openai_stream(stream)):
+                    for chunk in stream:
+                        if getattr(chunk, 'usage', None):
+                            details = getattr(chunk.usage, 'prompt_tokens_details', None)
+                            self._record_usage(chunk.usage.prompt_tokens, getattr(details, 'cached_tokens', 0) or 0)
+                        if not chunk.choices: continue
+                        delta = chunk.choices[0].delta.content
+                        if delta: yield delta
+            finally:
+                stream.close() # Also runs when the consumer abandons the turn.
         except Exception as e:
-            self.logger.error(f"Error calling OpenAI API: {e}")
-            return "I encountered an error with the OpenAI API."
+            e.backend = 'OpenAI'; raise
 
-    def _call_ollama(self, message_history):
+    def _stream_ollama(self, message_history, abortable):
         ollama_settings = self.config.get('ollama_settings', {})
         host = ollama_settings.get('host', 'http://localhost:11434')
         model = ollama_settings.get('model', 'llama3')
         
-        self.logger.info(f"Sending message history to Ollama ({len(message_history)} messages)...")
+        self.logger.info(f"Streaming message history to Ollama ({len(message_history)} messages)...")
+        started_at = time.monotonic(); first_token_at = None
+        was_warming = self.readiness == WARMING
         
         try:
-            response = requests.post(
+            with http_pool.session_for(host).post(
                 f"{host}/api/chat",
-                json={"model": model, "messages": message_history, "stream": False}
-            )
-            response.raise_for_status()
-            response_data = response.json()
-            return response_data['message']['content'].strip()
-        except requests.exceptions.ConnectionError:
-            self.logger.error(f"Ollama connection failed at {host}.")
-            return f"Ollama connection failed. Is Ollama running at {host}?"
+                json={"model": model, "messages": message_history, "stream": True, "keep_alive": self._keep_alive()},
+                stream=True,
+                timeout=http_pool.timeout
+            ) as response, abortable(lambda: _shut_down_response(response)):
+                response.raise_for_status()
+                # Ollama streams newline-delimited JSON objects, one per token batch.
+                for line in response.iter_lines():
+                    if not line: continue
+                    chunk = json.loads(line)
+                    if chunk.get('error'): raise RuntimeError(chunk['error'])
+                    delta = chunk.get('message', {}).get('content')
+                    if delta:
+                        if first_token_at is None: first_token_at = time.monotonic()
+                        yield delta
+                    if chunk.get('done'):
+                        self._log_ollama_latency(chunk, started_at, first_token_at, was_warming)
+                        # Ollama only evaluates the part of the prompt that isn't already in its KV cache.
+                        if 'prompt_eval_count' in chunk: self._record_usage(None, None, evaluated_tokens=chunk['prompt_eval_count'])
+                        break
         except Exception as e:
-            self.logger.error(f"Error calling Ollama API: {e}")
-            return "I encountered an error with the Ollama API."
\ No newline at end of file
+            e.backend = 'Ollama'; raise
+
+    def _record_usage(self, prompt_tokens, cached_tokens, evaluated_tokens=None):
+        self.last_usage = {'prompt_tokens': prompt_tokens, 'cached_tokens': cached_tokens, 'evaluated_tokens': evaluated_tokens}
+        self.usage_totals['calls'] += 1
+        if prompt_tokens is not None:
+            self.usage_totals['prompt_tokens'] += prompt_tokens; self.usage_totals['cached_tokens'] += cached_tokens
+            self.logger.info(f"OpenAI usage: {prompt_tokens} prompt tokens, {cached_tokens} served from the prompt cache "
+                             f"({self.usage_totals['cached_tokens']}/{self.usage_totals['prompt_tokens']} cached this session).")
+        else:
+            self.logger.info(f"Ollama evaluated {evaluated_tokens} prompt tokens (the rest were reused from its KV cache).")
+
+    def _log_ollama_latency(self, final_chunk, started_at, first_token_at, was_warming):
+        # load_duration (ns) is how long this request waited for the model to be loaded.
+        load_ms = final_chunk.get('load_duration', 0) / 1e6
+        cold = was_warming or load_ms > 500
+        first_token_ms = ((first_token_at or time.monotonic()) - started_at) * 1000
+        self.logger.info(f"Ollama {'cold' if cold else 'warm'} request: first token after {first_token_ms:.0f} ms, "
+                         f"total {(time.monotonic() - started_at) * 1000:.0f} ms, model load {load_ms:.0f} ms.")
+        self.readiness = READY
@@ -0,0 +1,182 @@
+#
+# File: src/services/audio_output.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.core.metrics import metrics
+from collections import deque
+import itertools
+import logging
+import threading
+import time
+
+USER_PRIORITY, PROACTIVE_PRIORITY = 0, 1 # lower plays first
+
+class Utterance:
+    """
+    One reply's worth of audio chunks on its way to the speaker. The producer
+    put()s chunks (blocking while one is already waiting, so synthesis stays
+    just one chunk ahead) and close()s it; wait() returns once it has been
+    played, or was cancelled, preempted, dropped as stale or barged in on.
+    """
+    def __init__(self, output, tts_provider, priority, turn_id, max_wait_seconds, sequence):
+        self.output = output; self.tts_provider = tts_provider
+        self.priority = priority; self.turn_id = turn_id; self.sequence = sequence
+        self.max_wait_seconds = max_wait_seconds; self.queued_at = time.monotonic()
+        self.chunks = deque(); self.closed = False
+        self.state = 'queued' # queued, playing, done, cancelled, preempted, stale, barged_in
+        self.success = True
+        self.finished = threading.Event()
+
+    def is_finished(self):
+        return self.finished.is_set()
+
+    def put(self, audio):
+        """Returns False once the utterance will no longer be played, so the producer can stop."""
+        with self.output.condition:
+            while self.chunks and not self.finished.is_set():
+                self.output.condition.wait(0.1)
+            if self.finished.is_set(): return False
+            self.chunks.append(audio); self.output.condition.notify_all()
+            return True
+
+    def close(self):
+        with self.output.condition:
+            self.closed = True; self.output.condition.notify_all()
+
+    def cancel(self):
+        self.output.end(self, 'cancelled')
+
+    def wait(self, timeout=None):
+        self.finished.wait(timeout)
+        return self.success
+
+class AudioOutput:
+    """
+    The one thread that plays audio. Utterances wait in priority order (user
+    replies before proactive tips); a user reply arriving while a tip plays
+    cuts the tip off. Utterances that waited longer than their
+    max_wait_seconds are dropped unplayed, and barge_in() silences
+    everything at once when the user starts talking.
+    """
+    def __init__(self):
+        self.logger = logging.getLogger("technical")
+        self.condition = threading.Condition()
+        self.waiting = []; self.current = None
+        self.calls = deque() # (fn, done event, result dict) to run on the playback thread between chunks
+        self.sequence = itertools.count()
+        self.counters = {'played': 0, 'cancelled': 0, 'preempted': 0, 'stale': 0, 'barged_in': 0, 'failed_chunks': 0}
+        self.running = True
+        self.thread = threading.Thread(target=self._playback_loop, name="AudioOutput", daemon=True)
+        self.thread.start()
+
+    def open(self, tts_provider, priority=USER_PRIORITY, turn_id=None, max_wait_seconds=None):
+        preempted = None
+        with self.condition:
+            utterance = Utterance(self, tts_provider, priority, turn_id, max_wait_seconds, next(self.sequence))
+            self.waiting.append(utterance)
+            if self.current and priority < self.current.priority:
+                preempted = self.current; self._finish(preempted, 'preempted')
+            self.condition.notify_all()
+        if preempted:
+            self.logger.info(f"Speech for turn {preempted.turn_id} preempted by a higher-priority reply.")
+            preempted.tts_provider.stop_playback()
+        return utterance
+
+    def end(self, utterance, reason):
+        with self.condition:
+            if utterance.is_finished(): return
+            was_playing = utterance is self.current
+            self._finish(utterance, reason)
+        if was_playing: utterance.tts_provider.stop_playback()
+
+    def barge_in(self):
+        """Stops the current utterance immediately and drops everything queued."""
+        with self.condition:
+            victims = ([self.current] if self.current else []) + list(self.waiting)
+            playing = self.current
+            for utterance in victims: self._finish(utterance, 'barged_in')
+        if victims: self.logger.info(f"Barge-in: stopped {len(victims)} utterance(s). Stats: {self.counters}")
+        if playing: playing.tts_provider.stop_playback()
+        return bool(victims)
+
+    def stop(self):
+        self.barge_in()
+        with self.condition:
+            self.running = False; self.condition.notify_all()
+        self.thread.join(2)
+
+    def call(self, fn, timeout=30):
+        """
+        Runs fn on the playback thread between chunks and returns its result.
+        For engines like pyttsx3 that must only be used from the thread that
+        speaks with them. Waits behind a chunk that is already playing.
+        """
+        done = threading.Event(); result = {}
+        with self.condition:
+            if not self.running: raise RuntimeError("audio output is stopped")
+            self.calls.append((fn, done, result)); self.condition.notify_all()
+        if not done.wait(timeout): raise TimeoutError("audio output thread is busy")
+        if 'error' in result: raise result['error']
+        return result.get('value')
+
+    def stats(self):
+        with self.condition: return dict(self.counters, waiting=len(self.waiting))
+
+    def _finish(self, utterance, state):
+        # Caller holds self.condition.
+        if utterance.is_finished(): return
+        utterance.state = state; utterance.chunks.clear()
+        if utterance in self.waiting: self.waiting.remove(utterance)
+        if utterance is self.current: self.current = None
+        self.counters['played' if state == 'done' else state] += 1
+        utterance.finished.set(); self.condition.notify_all()
+
+    @staticmethod
+    def _run_call(fn, done, result):
+        try: result['value'] = fn()
+        except Exception as e: result['error'] = e
+        done.set()
+
+    def _is_playing(self, utterance):
+        with self.condition: return utterance.state == 'playing'
+
+    def _drop_stale(self):
+        now = time.monotonic()
+        for utterance in [u for u in self.waiting if u.max_wait_seconds is not None and now - u.queued_at > u.max_wait_seconds]:
+            self.logger.info(f"Dropping speech for turn {utterance.turn_id}: waited more than {utterance.max_wait_seconds}s.")
+            self._finish(utterance, 'stale')
+
+    def _next_chunk(self):
+        # Caller holds self.condition. Returns (utterance, audio), a queued call, or None when stopping.
+        while self.running:
+            if self.calls: return self.calls.popleft()
+            self._drop_stale()
+            if self.current is None and self.waiting:
+                self.current = min(self.waiting, key=lambda u: (u.priority, u.sequence))
+                self.waiting.remove(self.current); self.current.state = 'playing'
+            if self.current is not None:
+                if self.current.chunks:
+                    audio = self.current.chunks.popleft(); self.condition.notify_all() # room for the next chunk
+                    return self.current, audio
+                if self.current.closed:
+                    self._finish(self.current, 'done'); continue
+            self.condition.wait(0.1)
+        return None
+
+    def _playback_loop(self):
+        while True:
+            with self.condition:
+                item = self._next_chunk()
+            if item is None: return
+            if len(item) == 3: self._run_call(*item); continue
+            utterance, audio = item
+            # A barge-in, cancel or preemption can land between taking the chunk and playing it; the
+            # provider rechecks just before it starts, after which its stop_playback() catches it.
+            still_wanted = lambda: self._is_playing(utterance)
+            with metrics.span('tts_playback', utterance.turn_id): played = utterance.tts_provider.play_audio(audio, still_wanted)
+            if not played:
+                with self.condition:
+                    # A chunk cut short by preemption or barge-in isn't a playback failure.
+                    if utterance.state == 'playing': utterance.success = False; self.counters['failed_chunks'] += 1
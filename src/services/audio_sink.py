@@ -0,0 +1,260 @@
+#
+# File: src/services/audio_sink.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.core.startup_timing import timed_import
+from collections import deque
+import ctypes
+import logging
+import threading
+import time
+
+SAMPLE_WIDTH = 2 # 16-bit mono PCM, as ElevenLabs' pcm_* formats deliver it
+
+class StreamingClip:
+    """
+    Raw PCM arriving from a network stream. Fetching starts on a background
+    thread as soon as the clip is created, so the next sentence downloads
+    while the current one plays. on_complete(bytes) gets the whole clip
+    once the stream ends cleanly (for the audio cache).
+    """
+    def __init__(self, parts=None, on_complete=None):
+        self.condition = threading.Condition()
+        self.pending = deque(); self.done = False; self.error = None
+        self.on_complete = on_complete
+        if parts is not None:
+            threading.Thread(target=self._fetch, args=(parts,), name="TTSFetch", daemon=True).start()
+
+    @classmethod
+    def from_bytes(cls, data):
+        clip = cls(); clip.pending.append(data); clip.done = True
+        return clip
+
+    def wait_for_data(self, timeout):
+        """True once there is audio to read or the stream has ended, whichever comes first."""
+        with self.condition:
+            return bool(self.condition.wait_for(lambda: self.pending or self.done, timeout))
+
+    def read(self, timeout=0.05):
+        """The next piece of audio; b"" if none has arrived yet, None once the stream is exhausted."""
+        with self.condition:
+            if not self.pending and not self.done: self.condition.wait(timeout)
+            if self.pending: return self.pending.popleft()
+            return None if self.done else b""
+
+    def _fetch(self, parts):
+        received = []
+        try:
+            for part in parts:
+                if not part: continue
+                received.append(part)
+                with self.condition: self.pending.append(part); self.condition.notify_all()
+        except Exception as e:
+            self.error = e
+            logging.getLogger("technical").error(f"TTS audio stream failed: {e}")
+        with self.condition: self.done = True; self.condition.notify_all()
+        if self.on_complete and self.error is None and received: self.on_complete(b"".join(received))
+
+class _RingBuffer:
+    """Fixed-capacity byte ring; allocated once and reused for every clip."""
+    def __init__(self, capacity):
+        self.data = bytearray(capacity); self.view = memoryview(self.data)
+        self.capacity = capacity; self.start = 0; self.size = 0
+
+    def free(self):
+        return self.capacity - self.size
+
+    def write(self, source):
+        """Copies as much of source as fits; returns the number of bytes taken."""
+        count = min(len(source), self.free()); end = (self.start + self.size) % self.capacity
+        first = min(count, self.capacity - end)
+        self.view[end:end + first] = source[:first]; self.view[:count - first] = source[first:count]
+        self.size += count
+        return count
+
+    def read_into(self, target):
+        count = min(len(target), self.size); first = min(count, self.capacity - self.start)
+        target[:first] = self.view[self.start:self.start + first]; target[first:count] = self.view[:count - first]
+        self.start = (self.start + count) % self.capacity; self.size -= count
+        return count
+
+    def clear(self):
+        self.start = 0; self.size = 0
+
+class PCMAudioSink:
+    """
+    In-process speaker output for streamed PCM. A PyAudio stream is opened on
+    the first play(), kept open across back-to-back clips and closed again
+    after idle_close_seconds without speech. PortAudio's callback thread
+    pulls fixed-size periods from a preallocated ring buffer that play()
+    feeds as network chunks arrive, so playback starts with the first chunk
+    instead of after the whole clip. When the ring runs dry mid-clip the
+    callback plays silence and counts an underrun. stop() empties the ring,
+    so speech stops within one period, and bumps a generation counter that
+    the clip being played checks, so a stop is never lost to a clip that is
+    just starting.
+    """
+    DEFAULTS = {"enabled": True, "sample_rate": 22050, "frames_per_buffer": 1024, "buffer_periods": 8, "idle_close_seconds": 10}
+
+    def __init__(self):
+        self.logger = logging.getLogger("technical")
+        self.condition = threading.Condition()
+        self.play_lock = threading.Lock() # one clip at a time
+        self.settings = dict(self.DEFAULTS)
+        self.pyaudio = None; self.stream = None; self.unavailable = False
+        self.ring = None; self.period = None; self.period_view = None; self.silence = None
+        self.feeding = False; self.primed = False
+        self.generation = 0; self.clip_generation = None # stop() bumps generation; a clip from an older one is stopped
+        self.continue_flag = None
+        self.last_played_at = 0.0; self.idle_timer = None
+        self.counters = {'clips': 0, 'underruns': 0, 'underrun_frames': 0, 'device_underflows': 0, 'stopped': 0}
+
+    def configure(self, sink_settings):
+        new_settings = {**self.DEFAULTS, **(sink_settings or {})}
+        if new_settings == self.settings: return
+        self.close()
+        with self.condition: self.settings = new_settings; self.unavailable = False
+        self.logger.info(f"Audio sink configured: {new_settings}")
+
+    @property
+    def output_format(self):
+        """The ElevenLabs output_format matching this sink."""
+        return f"pcm_{self.settings['sample_rate']}"
+
+    def is_available(self):
+        """Whether PCM should be routed here. Cheap: the device itself is only opened by play()."""
+        if not self.settings['enabled'] or self.unavailable: return False
+        try:
+            timed_import('pyaudio'); return True
+        except ImportError:
+            return False
+
+    def play(self, clip, still_wanted=None):
+        """
+        Blocking: feeds clip into the device as it arrives and returns once it
+        has been heard (or stopped). still_wanted() is checked before anything
+        plays, for a stop() that came before this call.
+        """
+        with self.play_lock:
+            with self.condition: generation = self.generation
+            # From here on a stop() shows up as a new generation; one issued earlier, through still_wanted().
+            if still_wanted and not still_wanted(): return False
+            if self._open_stream() is None: return False
+            stopped = lambda: self.generation != generation
+            with self.condition:
+                self.feeding = True; self.primed = False; self.clip_generation = generation
+                self.counters['clips'] += 1; underruns_before = self.counters['underruns']
+            carry = b"" # an odd trailing byte waits for its other half
+            try:
+                while not stopped():
+                    part = clip.read()
+                    if part is None: break
+                    if not part: continue
+                    part = carry + part if carry else part
+                    usable = len(part) - len(part) % SAMPLE_WIDTH; carry = part[usable:]
+                    self._feed(memoryview(part)[:usable], generation)
+            finally:
+                with self.condition: self.feeding = False
+            # Let what is already in the ring reach the speaker before the next clip starts.
+            ring_seconds = self.ring.capacity / (self.settings['sample_rate'] * SAMPLE_WIDTH)
+            with self.condition:
+                self.condition.wait_for(lambda: self.ring.size == 0 or stopped() or self.stream is None, ring_seconds + 1)
+                underruns = self.counters['underruns'] - underruns_before
+            if underruns: self.logger.warning(f"Audio underran {underruns} time(s) waiting for the TTS stream. Stats: {self.stats()}")
+            self.last_played_at = time.monotonic(); self._schedule_idle_close()
+            return clip.error is None
+
+    def stop(self):
+        with self.condition:
+            self.generation += 1
+            if self.ring and self.ring.size: self.counters['stopped'] += 1
+            if self.ring: self.ring.clear()
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition: return dict(self.counters)
+
+    def close(self):
+        if self.idle_timer: self.idle_timer.cancel(); self.idle_timer = None
+        self.stop(); self._close_stream()
+
+    def _close_stream(self):
+        with self.condition:
+            stream, self.stream = self.stream, None
+            pyaudio_instance, self.pyaudio = self.pyaudio, None
+            self.condition.notify_all()
+        if stream:
+            try: stream.stop_stream(); stream.close()
+            except Exception as e: self.logger.warning(f"Could not close audio output stream: {e}")
+        if pyaudio_instance: pyaudio_instance.terminate()
+
+    def _schedule_idle_close(self):
+        # An open stream keeps the device busy (and can keep the OS awake) even while it only plays silence.
+        if self.idle_timer: self.idle_timer.cancel()
+        self.idle_timer = threading.Timer(self.settings['idle_close_seconds'], self._close_if_idle)
+        self.idle_timer.daemon = True; self.idle_timer.start()
+
+    def _close_if_idle(self):
+        if not self.play_lock.acquire(blocking=False): return # playing again; that clip reschedules
+        try:
+            if self.stream is None or time.monotonic() - self.last_played_at < self.settings['idle_close_seconds']: return
+            self.idle_timer = None; self._close_stream()
+            self.logger.info("Closed idle audio output stream.")
+        finally:
+            self.play_lock.release()
+
+    def _feed(self, view, generation):
+        with self.condition:
+            while view and self.generation == generation and self.stream is not None:
+                taken = self.ring.write(view); view = view[taken:]
+                if taken: self.primed = True
+                if view: self.condition.wait(0.1) # ring full; the callback frees a period at a time
+
+    def _open_stream(self):
+        with self.condition:
+            if self.stream is not None: return self.stream
+            if self.unavailable or not self.settings['enabled']: return None
+            try:
+                pyaudio = timed_import('pyaudio')
+                frames = self.settings['frames_per_buffer']; period_bytes = frames * SAMPLE_WIDTH
+                if self.ring is None or self.ring.capacity != period_bytes * self.settings['buffer_periods']:
+                    self.ring = _RingBuffer(period_bytes * self.settings['buffer_periods'])
+                self._allocate_period(period_bytes)
+                self.continue_flag = pyaudio.paContinue; self.pyaudio = pyaudio.PyAudio()
+                self.stream = self.pyaudio.open(format=self.pyaudio.get_format_from_width(SAMPLE_WIDTH), channels=1,
+                                                rate=self.settings['sample_rate'], output=True,
+                                                frames_per_buffer=frames, stream_callback=self._callback)
+                self.stream.start_stream()
+                self.logger.info(f"Opened in-process audio output ({self.settings['sample_rate']} Hz, {frames} frames per period).")
+            except Exception as e:
+                self.logger.warning(f"In-process audio output unavailable; falling back to the external player: {e}")
+                self.unavailable = True; self.stream = None
+                if self.pyaudio: self.pyaudio.terminate(); self.pyaudio = None
+            return self.stream
+
+    def _allocate_period(self, period_bytes):
+        # PyAudio only accepts a callback result without a buffer-release hook, which rules out
+        # bytearray and memoryview; a ctypes array qualifies and can be refilled in place.
+        self.period = (ctypes.c_char * period_bytes)(); self.period_view = memoryview(self.period).cast('B')
+        self.silence = memoryview(bytes(period_bytes))
+
+    def _callback(self, in_data, frame_count, time_info, status_flags):
+        # PortAudio's thread: never block here beyond the short ring lock, and allocate nothing.
+        with self.condition:
+            wanted = frame_count * SAMPLE_WIDTH
+            if wanted != len(self.period_view): self._allocate_period(wanted) # only if the host changes the period size
+            target = self.period_view
+            got = self.ring.read_into(target)
+            if got < wanted:
+                target[got:] = self.silence[got:]
+                # Running dry between clips is just silence; running dry while a started clip is still arriving is an underrun.
+                if self.feeding and self.primed and self.clip_generation == self.generation:
+                    self.counters['underruns'] += 1; self.counters['underrun_frames'] += (wanted - got) // SAMPLE_WIDTH
+            if status_flags: self.counters['device_underflows'] += 1
+            self.condition.notify_all()
+            # PortAudio copies the period out before the next callback, so the same buffer is reused.
+            return self.period, self.continue_flag
+
+audio_sink = PCMAudioSink()
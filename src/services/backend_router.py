@@ -0,0 +1,226 @@
+#
+# File: src/services/backend_router.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from collections import deque
+import contextlib
+import logging
+import queue
+import threading
+import time
+
+class AbortSignal:
+    """
+    One-shot, thread-safe cancellation. Code holding a live connection wraps
+    it in abortable(callback), and fire() runs callback from the firing
+    thread to tear the connection down while a read may be blocked on it.
+    """
+    def __init__(self):
+        self.lock = threading.Lock(); self.fired = False; self.callbacks = []
+
+    def is_set(self):
+        return self.fired
+
+    def fire(self):
+        with self.lock:
+            if self.fired: return
+            self.fired = True; callbacks = list(self.callbacks)
+        for callback in callbacks:
+            try: callback()
+            except Exception as e: logging.getLogger("technical").debug(f"Aborting a connection: {e}")
+
+    @contextlib.contextmanager
+    def abortable(self, callback):
+        """Registers callback for the duration of the block; runs it at once if already fired."""
+        with self.lock:
+            fired = self.fired
+            if not fired: self.callbacks.append(callback)
+        if fired: callback()
+        try:
+            yield
+        finally:
+            with self.lock:
+                if callback in self.callbacks: self.callbacks.remove(callback)
+
+class BackendStats:
+    """
+    Rolling first-token latency and error rate for one backend. A backend
+    cancelled before its first token only tells us it would have taken
+    longer than it ran; those lower bounds are kept apart from the latencies.
+    """
+    def __init__(self, window=50, window_seconds=600):
+        self.first_token_latencies = deque(maxlen=window)
+        self.lower_bounds = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window) # (finished_at, succeeded)
+        self.window_seconds = window_seconds
+
+    def record_first_token(self, seconds):
+        self.first_token_latencies.append(seconds)
+
+    def record_lower_bound(self, seconds):
+        self.lower_bounds.append(seconds)
+
+    def record_outcome(self, succeeded):
+        self.outcomes.append((time.monotonic(), succeeded))
+
+    def error_rate(self):
+        # Old failures age out, so a demoted backend gets another chance after a while.
+        cutoff = time.monotonic() - self.window_seconds
+        recent = [succeeded for finished_at, succeeded in self.outcomes if finished_at >= cutoff]
+        return (recent.count(False) / len(recent), len(recent)) if recent else (0.0, 0)
+
+    def percentile(self, p):
+        if not self.first_token_latencies: return None
+        ordered = sorted(self.first_token_latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+class BackendRouter:
+    """
+    Streams a response from an ordered list of backends. The preferred
+    backend goes first; if it hasn't produced a first token by a deadline
+    taken from its own first-token latency percentile, the next backend is
+    started as a hedge, and if it fails outright the next one is tried at
+    once. The first backend to yield text wins and the others are cancelled.
+    Backends that keep failing, or are consistently slower, drop down the order.
+    """
+    MIN_SAMPLES = 5
+
+    def __init__(self, backends, hedge_percentile=90, hedge_default_ms=3000, hedge_min_ms=500, hedge_max_ms=10000):
+        self.logger = logging.getLogger("technical")
+        self.backends = list(backends)
+        self.hedge_percentile = hedge_percentile
+        self.hedge_default = hedge_default_ms / 1000; self.hedge_min = hedge_min_ms / 1000; self.hedge_max = hedge_max_ms / 1000
+        self.stats = {name: BackendStats() for name in self.backends}
+        self.lock = threading.Lock()
+        self.counters = {'requests': 0, 'hedges': 0, 'secondary_wins': 0, 'fallbacks': 0, 'failures': 0}
+
+    @classmethod
+    def from_settings(cls, backends, fallback_settings):
+        fallback_settings = fallback_settings or {}
+        return cls(backends, hedge_percentile=fallback_settings.get('hedge_percentile', 90),
+                   hedge_default_ms=fallback_settings.get('hedge_default_ms', 3000),
+                   hedge_min_ms=fallback_settings.get('hedge_min_ms', 500),
+                   hedge_max_ms=fallback_settings.get('hedge_max_ms', 10000))
+
+    def order(self):
+        """Configured order, with unhealthy backends moved last and, once measured, faster ones first."""
+        with self.lock:
+            # Latency only reorders once every backend has been timed often enough to compare fairly.
+            all_timed = all(len(s.first_token_latencies) + len(s.lower_bounds) >= self.MIN_SAMPLES for s in self.stats.values())
+            def sort_key(item):
+                index, name = item; stats = self.stats[name]
+                error_rate, samples = stats.error_rate()
+                unhealthy = samples >= 3 and error_rate >= 0.5
+                if not all_timed: latency = (0, 0)
+                elif len(stats.first_token_latencies) >= self.MIN_SAMPLES: latency = (0, stats.percentile(50))
+                else: latency = (1, 0) # only known to be slower than something; never ahead of a measured backend
+                return (unhealthy, latency, index)
+            return [name for _, name in sorted(enumerate(self.backends), key=sort_key)]
+
+    def hedge_deadline(self, name):
+        with self.lock:
+            stats = self.stats[name]
+            if len(stats.first_token_latencies) < self.MIN_SAMPLES: return self.hedge_default
+            return min(self.hedge_max, max(self.hedge_min, stats.percentile(self.hedge_percentile)))
+
+    def stream(self, open_stream, abortable=contextlib.nullcontext):
+        """
+        Yields text deltas from whichever backend answers first.
+        open_stream(name, abortable) must return a generator that raises on
+        failure and registers its live connection with abortable, so a
+        cancelled pump is shut down instead of waiting for its next token.
+        Raises the last error if every backend fails before producing text.
+        The caller's own abortable ends the whole stream at once, without
+        falling back to another backend.
+        """
+        candidates = self.order(); events = queue.Queue()
+        running = {} # name -> (cancel event, started_at)
+        with self.lock: self.counters['requests'] += 1
+
+        def launch(name):
+            cancel = AbortSignal(); running[name] = (cancel, time.monotonic())
+            threading.Thread(target=self._pump, args=(name, open_stream, cancel, events), name=f"Backend-{name}", daemon=True).start()
+
+        winner = None; last_error = None
+        try:
+            # Registered before any pump starts, so an abort is queued ahead of the errors it causes.
+            with abortable(lambda: events.put(('abort', None, None))):
+                next_index = 1; launch(candidates[0])
+                deadline = time.monotonic() + self.hedge_deadline(candidates[0])
+                while winner is None:
+                    if not running:
+                        if next_index >= len(candidates):
+                            with self.lock: self.counters['failures'] += 1
+                            raise last_error or RuntimeError("no AI backend available")
+                        with self.lock: self.counters['fallbacks'] += 1
+                        self.logger.warning(f"Falling back to AI backend '{candidates[next_index]}'.")
+                        launch(candidates[next_index]); next_index += 1
+                        deadline = time.monotonic() + self.hedge_deadline(candidates[next_index - 1])
+                    try:
+                        timeout = max(0, deadline - time.monotonic()) if next_index < len(candidates) else None
+                        kind, name, payload = events.get(timeout=timeout)
+                    except queue.Empty:
+                        hedge = candidates[next_index]; next_index += 1
+                        with self.lock: self.counters['hedges'] += 1
+                        self.logger.info(f"No first token yet; hedging with AI backend '{hedge}'.")
+                        launch(hedge); deadline = time.monotonic() + self.hedge_deadline(hedge)
+                        continue
+                    if kind == 'abort': return
+                    if name not in running: continue
+                    if kind == 'error':
+                        last_error = payload; del running[name]
+                        with self.lock: self.stats[name].record_outcome(False)
+                        self.logger.warning(f"AI backend '{name}' failed: {payload}")
+                        continue
+                    winner = name; elapsed = time.monotonic() - running[name][1]
+                    with self.lock:
+                        self.stats[name].record_first_token(elapsed)
+                        if name != candidates[0]: self.counters['secondary_wins'] += 1
+                    self._cancel_others(running, winner)
+                    self.logger.info(f"AI backend '{winner}' answered first after {elapsed * 1000:.0f} ms.")
+                    if kind == 'done':
+                        with self.lock: self.stats[name].record_outcome(True)
+                        return
+                    yield payload
+                while True:
+                    kind, name, payload = events.get()
+                    if kind == 'abort': return
+                    if name != winner: continue
+                    if kind == 'delta': yield payload; continue
+                    with self.lock: self.stats[winner].record_outcome(kind == 'done')
+                    if kind == 'error': raise payload
+                    return
+        finally:
+            for cancel, _ in running.values(): cancel.fire()
+
+    def _cancel_others(self, running, winner):
+        now = time.monotonic()
+        for name in [n for n in running if n != winner]:
+            cancel, started_at = running.pop(name); cancel.fire()
+            # No token yet, so this is how long it ran, not a first-token latency.
+            with self.lock: self.stats[name].record_lower_bound(now - started_at)
+
+    @staticmethod
+    def _pump(name, open_stream, cancel, events):
+        stream = None
+        try:
+            stream = open_stream(name, cancel.abortable)
+            for delta in stream:
+                if cancel.is_set(): return
+                events.put(('delta', name, delta))
+            events.put(('done', name, None))
+        except Exception as e:
+            events.put(('error', name, e))
+        finally:
+            if stream is not None: stream.close()
+
+    def snapshot(self):
+        with self.lock:
+            backends = {}
+            for name, stats in self.stats.items():
+                error_rate, samples = stats.error_rate()
+                backends[name] = {'first_token_p50': stats.percentile(50), f'first_token_p{self.hedge_percentile}': stats.percentile(self.hedge_percentile),
+                                  'error_rate': error_rate, 'outcomes': samples, 'cancelled_before_first_token': len(stats.lower_bounds)}
+            return dict(self.counters, backends=backends)
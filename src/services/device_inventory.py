@@ -0,0 +1,93 @@
+#
+# File: src/services/device_inventory.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+import logging
+import threading
+
+class DeviceInventory(QObject):
+    """
+    Enumerates microphones and local TTS voices once, on a background thread,
+    and caches the result for the settings dialog. Re-enumerates on refresh()
+    or when the set of audio inputs changes while someone is watching.
+    """
+    inventory_updated = pyqtSignal(dict)
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None: cls._instance = DeviceInventory()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self.logger = logging.getLogger("technical")
+        self.lock = threading.Lock()
+        self.inventory = None # {'microphones': [name, ...], 'local_voices': [(voice_id, name), ...], 'errors': [...]}
+        self.is_refreshing = False
+        self.voice_source = None # returns the live engine's voices, or None when there is no live engine
+        self.device_signature = None
+        self.hotplug_timer = QTimer(self)
+        self.hotplug_timer.timeout.connect(self._check_for_hotplug)
+        self.hotplug_interval_ms = 3000
+
+    def snapshot(self):
+        """Cached inventory, or None if the first enumeration hasn't finished."""
+        with self.lock: return self.inventory
+
+    def refresh(self):
+        with self.lock:
+            if self.is_refreshing: return
+            self.is_refreshing = True
+        threading.Thread(target=self._enumerate, name="DeviceInventory", daemon=True).start()
+
+    def set_voice_source(self, voice_source):
+        """Where voices come from while a local TTS engine is live; it must not be touched from this thread."""
+        self.voice_source = voice_source
+
+    def ensure_loaded(self):
+        if self.snapshot() is None: self.refresh()
+
+    def set_watching(self, watching):
+        """Poll for hot-plugged audio inputs only while a consumer (the dialog) is visible."""
+        if watching and not self.hotplug_timer.isActive():
+            self.device_signature = self._audio_input_signature()
+            if self.device_signature is not None: self.hotplug_timer.start(self.hotplug_interval_ms)
+        elif not watching:
+            self.hotplug_timer.stop()
+
+    def _enumerate(self):
+        from src.services.stt_provider import STTProvider
+        from src.services.tts_provider import TTSProvider
+        inventory = {'microphones': [], 'local_voices': [], 'errors': []}
+        try:
+            inventory['microphones'] = list(STTProvider.list_microphones())
+        except Exception as e:
+            self.logger.error(f"Could not list microphones: {e}"); inventory['errors'].append('microphones')
+        try:
+            voices = self.voice_source() if self.voice_source else None
+            if voices is None: voices = TTSProvider.list_local_voices()
+            inventory['local_voices'] = [(voice.id, voice.name) for voice in voices]
+        except Exception as e:
+            self.logger.error(f"Could not list local voices: {e}"); inventory['errors'].append('local_voices')
+        with self.lock:
+            self.inventory = inventory; self.is_refreshing = False
+        self.logger.info(f"Device inventory: {len(inventory['microphones'])} microphones, {len(inventory['local_voices'])} local voices.")
+        self.inventory_updated.emit(inventory) # Queued to receivers on the GUI thread.
+
+    def _audio_input_signature(self):
+        # Qt's device list is cheap to poll; re-initializing PortAudio every few seconds is not.
+        try:
+            from PyQt5.QtMultimedia import QAudio, QAudioDeviceInfo
+        except ImportError:
+            return None
+        return tuple(sorted(device.deviceName() for device in QAudioDeviceInfo.availableDevices(QAudio.AudioInput)))
+
+    def _check_for_hotplug(self):
+        signature = self._audio_input_signature()
+        if signature is not None and signature != self.device_signature:
+            self.logger.info("Audio input devices changed; refreshing device inventory.")
+            self.device_signature = signature; self.refresh()
@@ -0,0 +1,88 @@
+#
+# File: src/services/http_pool.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from urllib.parse import urlsplit
+import logging
+import threading
+
+class HttpPool:
+    """
+    Process-wide HTTP connection pool shared by all providers. Keeps one
+    keep-alive session per host and one API client per key, so rebuilding a
+    provider after a settings change reuses warm connections.
+    """
+    DEFAULTS = {"connect_timeout_seconds": 5, "read_timeout_seconds": 60, "pool_maxsize": 4}
+
+    def __init__(self):
+        self.logger = logging.getLogger("technical")
+        self.lock = threading.Lock()
+        self.settings = dict(self.DEFAULTS)
+        self.sessions = {}
+        self.clients = {}
+
+    def configure(self, network_settings):
+        new_settings = {**self.DEFAULTS, **(network_settings or {})}
+        with self.lock:
+            if new_settings == self.settings: return
+            pool_changed = new_settings['pool_maxsize'] != self.settings['pool_maxsize']
+            self.settings = new_settings
+            if pool_changed:
+                # requests takes its timeout per call; only a new pool size needs fresh adapters.
+                for session in self.sessions.values(): session.close()
+                self.sessions.clear()
+            # API clients bake their timeouts in at construction.
+            for _, http_client in self.clients.values(): http_client.close()
+            self.clients.clear()
+        self.logger.info(f"HTTP pool configured: {new_settings}")
+
+    @property
+    def timeout(self):
+        """(connect, read) tuple in the form requests expects."""
+        return (self.settings['connect_timeout_seconds'], self.settings['read_timeout_seconds'])
+
+    def session_for(self, url):
+        import requests
+        from requests.adapters import HTTPAdapter
+        parts = urlsplit(url); host_key = f"{parts.scheme}://{parts.netloc}"
+        with self.lock:
+            session = self.sessions.get(host_key)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.settings['pool_maxsize'], pool_block=True)
+                session.mount(f"{parts.scheme}://", adapter)
+                self.sessions[host_key] = session
+                self.logger.info(f"Opened pooled HTTP session for {host_key}.")
+            return session
+
+    def openai_client(self, api_key):
+        return self._client(('openai', api_key), lambda http_client, timeout: self._make_openai(api_key, http_client, timeout))
+
+    def elevenlabs_client(self, api_key):
+        return self._client(('elevenlabs', api_key), lambda http_client, timeout: self._make_elevenlabs(api_key, http_client, timeout))
+
+    def _client(self, key, factory):
+        import httpx
+        with self.lock:
+            if key not in self.clients:
+                connect, read = self.timeout
+                timeout = httpx.Timeout(read, connect=connect)
+                limits = httpx.Limits(max_connections=self.settings['pool_maxsize'], max_keepalive_connections=self.settings['pool_maxsize'])
+                http_client = httpx.Client(timeout=timeout, limits=limits)
+                self.clients[key] = (factory(http_client, timeout), http_client)
+                self.logger.info(f"Created pooled {key[0]} client.")
+            return self.clients[key][0]
+
+    @staticmethod
+    def _make_openai(api_key, http_client, timeout):
+        from openai import OpenAI
+        return OpenAI(api_key=api_key, http_client=http_client, timeout=timeout)
+
+    @staticmethod
+    def _make_elevenlabs(api_key, http_client, timeout):
+        from elevenlabs.client import ElevenLabs
+        return ElevenLabs(api_key=api_key, httpx_client=http_client, timeout=timeout.read)
+
+http_pool = HttpPool()
@@ -0,0 +1,33 @@
+#
+# File: src/services/registry.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.core.startup_timing import timed_import
+
+# Service kind -> "module:Class". Nothing is imported until a service is built;
+# each provider then imports only the SDK of the backend it is configured for.
+_BACKENDS = {
+    'ai': 'src.services.ai_provider:AIProvider',
+    'tts': 'src.services.tts_provider:TTSProvider',
+    'stt': 'src.services.stt_provider:STTProvider',
+}
+_loaded = {}
+
+def register(kind, target):
+    """Points a service kind at another implementation ("module:Class" or a class)."""
+    _BACKENDS[kind] = target; _loaded.pop(kind, None)
+
+def load(kind):
+    """Returns the provider class for kind, importing its module on first use."""
+    provider_class = _loaded.get(kind)
+    if provider_class is None:
+        target = _BACKENDS[kind]
+        if isinstance(target, str):
+            module_name, class_name = target.split(':')
+            provider_class = getattr(timed_import(module_name), class_name)
+        else:
+            provider_class = target
+        _loaded[kind] = provider_class
+    return provider_class
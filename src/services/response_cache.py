@@ -0,0 +1,108 @@
+#
+# File: src/services/response_cache.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+
+# Lines that change on every call but don't change what a good answer looks like.
+DEFAULT_IGNORE_PATTERNS = [r'^Current date and time is:.*$']
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of AI responses with per-entry TTL. Keys are a hash
+    of the normalized message list, so repeated proactive prompts in the same
+    window context are answered without a paid LLM call.
+    """
+    def __init__(self, max_entries=64, ttl_seconds=900, persist_path=None, ignore_patterns=None):
+        self.logger = logging.getLogger("technical")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self.ignore_patterns = [re.compile(p, re.MULTILINE) for p in (ignore_patterns or DEFAULT_IGNORE_PATTERNS)]
+        self.entries = OrderedDict() # key -> (expires_at, response)
+        self.lock = threading.Lock()
+        self.hits = 0; self.misses = 0; self.evictions = 0; self.expirations = 0
+        if self.persist_path: self._load()
+
+    @classmethod
+    def from_settings(cls, cache_settings):
+        """Returns a configured cache, or None when caching is disabled."""
+        cache_settings = cache_settings or {}
+        if not cache_settings.get('enabled', False): return None
+        return cls(max_entries=cache_settings.get('max_entries', 64),
+                   ttl_seconds=cache_settings.get('ttl_seconds', 900),
+                   persist_path=cache_settings.get('persist_path') or None,
+                   ignore_patterns=cache_settings.get('ignore_patterns'))
+
+    def make_key(self, messages):
+        normalized = []
+        for message in messages:
+            content = message.get('content', '')
+            for pattern in self.ignore_patterns: content = pattern.sub('', content)
+            normalized.append([message.get('role'), re.sub(r'\s+', ' ', content).strip()])
+        return hashlib.sha256(json.dumps(normalized, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def get(self, messages):
+        key = self.make_key(messages)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] < time.time():
+                del self.entries[key]; self.expirations += 1; entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key); self.hits += 1
+            return entry[1]
+
+    def put(self, messages, response):
+        key = self.make_key(messages)
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl_seconds, response)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False); self.evictions += 1
+        if self.persist_path: self._save()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'expirations': self.expirations,
+                    'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def _load(self):
+        if not os.path.exists(self.persist_path): return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+            now = time.time()
+            for key, expires_at, response in stored.get('entries', []):
+                if expires_at > now: self.entries[key] = (expires_at, response)
+            while len(self.entries) > self.max_entries: self.entries.popitem(last=False)
+            self.logger.info(f"Loaded {len(self.entries)} cached responses from {self.persist_path}.")
+        except Exception as e:
+            self.logger.warning(f"Could not load response cache from {self.persist_path}: {e}")
+
+    def _save(self):
+        with self.lock:
+            stored = {'entries': [[key, expires_at, response] for key, (expires_at, response) in self.entries.items()]}
+        try:
+            directory = os.path.dirname(self.persist_path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temp file and swap it in so a crash never leaves a half-written cache.
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(stored, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            self.logger.warning(f"Could not persist response cache to {self.persist_path}: {e}")
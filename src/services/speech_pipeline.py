@@ -0,0 +1,82 @@
+#
+# File: src/services/speech_pipeline.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.core.metrics import metrics
+from src.services.audio_output import USER_PRIORITY
+import logging
+import queue
+import re
+import threading
+
+_SENTENCE_END = re.compile(r'(?<=[.!?…])["\')\]]*\s+|\n+')
+_DONE = object()
+
+class SpeechPipeline:
+    """
+    Speaks a reply sentence by sentence while it is still being generated.
+    Text is fed in as it streams, split into sentence chunks and synthesized
+    one chunk ahead of playback; the audio goes to the shared AudioOutput as
+    one utterance, which decides when (and whether) it is heard.
+    """
+    def __init__(self, tts_provider, audio_output, min_chunk_chars=24, turn_id=None, priority=USER_PRIORITY, max_wait_seconds=None):
+        self.logger = logging.getLogger("technical")
+        self.tts_provider = tts_provider; self.audio_output = audio_output
+        self.turn_id = turn_id # for correlating synthesis/playback timings with the turn
+        self.priority = priority; self.max_wait_seconds = max_wait_seconds
+        self.min_chunk_chars = min_chunk_chars
+        self.buffer = ""
+        self.text_queue = queue.Queue()
+        self.utterance = None
+        self.success = True
+        self.cancelled = False
+        self.synth_thread = threading.Thread(target=self._synthesis_loop, name="TTSSynthesis", daemon=True)
+
+    def start(self):
+        self.utterance = self.audio_output.open(self.tts_provider, self.priority, self.turn_id, self.max_wait_seconds)
+        self.synth_thread.start()
+        return self
+
+    def feed(self, delta):
+        if self.cancelled: return
+        self.buffer += delta
+        while True:
+            # Hold back very short sentences ("Sure.") so they ride along with the next one.
+            split_at = next((m.end() for m in _SENTENCE_END.finditer(self.buffer) if m.end() >= self.min_chunk_chars), None)
+            if split_at is None: break
+            chunk, self.buffer = self.buffer[:split_at].strip(), self.buffer[split_at:]
+            if chunk: self.text_queue.put(chunk)
+
+    def cancel(self):
+        """Drops everything not yet spoken and interrupts the current chunk where the engine allows."""
+        if self.cancelled: return
+        self.cancelled = True; self.buffer = ""
+        try:
+            while True: self.text_queue.get_nowait()
+        except queue.Empty:
+            pass
+        self.text_queue.put(_DONE)
+        self.utterance.cancel()
+
+    def finish(self):
+        if self.cancelled: return
+        chunk = self.buffer.strip(); self.buffer = ""
+        if chunk: self.text_queue.put(chunk)
+        self.text_queue.put(_DONE)
+
+    def wait(self):
+        """True unless synthesis or playback failed; a reply cut off by the user or a newer reply still counts as spoken."""
+        self.synth_thread.join()
+        return self.utterance.wait() and self.success
+
+    def _synthesis_loop(self):
+        while True:
+            chunk = self.text_queue.get()
+            # Stop synthesizing once nobody will hear it (cancelled, preempted, stale or barged in on).
+            if chunk is _DONE or self.cancelled or self.utterance.is_finished(): break
+            with metrics.span('tts_synthesize', self.turn_id): audio = self.tts_provider.synthesize(chunk)
+            if audio is None: self.success = False; continue
+            if not self.utterance.put(audio): break
+        self.utterance.close()
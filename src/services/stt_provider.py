@@ -4,23 +4,31 @@
 # ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
 #
 
-import speech_recognition as sr
+from src.core.metrics import metrics
+from src.core.startup_timing import timed_import
 import threading
 import queue
 import logging
 
 class STTProvider:
+    SETTINGS_KEYS = ('audio_input.mic_device_index', 'audio_input.vad')
+
     @staticmethod
     def list_microphones():
-        return sr.Microphone.list_microphone_names()
+        return timed_import('speech_recognition').Microphone.list_microphone_names()
 
-    def __init__(self, device_index=None):
+    def __init__(self, device_index=None, vad_settings=None):
         self.logger = logging.getLogger("technical")
+        self.sr = sr = timed_import('speech_recognition')
         self.recognizer = sr.Recognizer()
         self.device_index = device_index
         self.microphone = None
         self.stop_listening_func = None
         self.is_listening = False
+        self.vad = None
+        if (vad_settings or {}).get('enabled', True):
+            # NumPy is only needed when the VAD stage is on.
+            self.vad = timed_import('src.services.vad').VoiceActivityDetector.from_settings(vad_settings)
         
         self.recognizer.energy_threshold = 3000
         self.recognizer.dynamic_energy_threshold = False
@@ -34,12 +42,17 @@ class STTProvider:
         except Exception as e:
             self.logger.critical(f"Could not open microphone with index {self.device_index}. STT will not work. Error: {e}")
 
-    def start_background_listening(self, callback):
+    def start_background_listening(self, on_audio, on_speech=None):
+        """
+        on_audio(audio) is called on the capture thread for each phrase that
+        passes VAD; on_speech(), if given, just before it, as soon as the
+        phrase is known to be speech (used for barge-in).
+        """
         if self.is_listening or not self.microphone: return
         self.is_listening = True
         self.stop_listening_func = self.recognizer.listen_in_background(
             self.microphone,
-            lambda r, a: self._process_audio_thread(r, a, callback),
+            lambda r, a: self._process_audio_thread(r, a, on_audio, on_speech),
             phrase_time_limit=10
         )
         self.logger.info("Started 'Always-On' background listening.")
@@ -51,35 +64,47 @@ class STTProvider:
             self.is_listening = False
             self.logger.info("Stopped 'Always-On' background listening.")
 
-    def _process_audio_thread(self, recognizer, audio, callback):
+    def _process_audio_thread(self, recognizer, audio, on_audio, on_speech=None):
         self.logger.info("Audio detected by background listener, processing...")
+        if self.vad:
+            # The energy threshold lets through clatter and music; only send real speech to recognition.
+            pcm = audio.get_raw_data(convert_rate=self.vad.sample_rate, convert_width=2)
+            if not self.vad.is_speech(pcm):
+                self.logger.info(f"VAD rejected background segment as non-speech. Stats: {self.vad.stats()}")
+                return
+        if on_speech: on_speech()
+        on_audio(audio)
+
+    def recognize(self, audio):
+        """Transcribes one captured phrase; returns None if nothing usable was heard."""
         try:
-            text = recognizer.recognize_google(audio)
+            with metrics.span('stt_recognize'): text = self.recognizer.recognize_google(audio)
             self.logger.info(f"Background transcription successful: '{text}'")
-            callback(text)
-        except sr.UnknownValueError:
+            return text
+        except self.sr.UnknownValueError:
             self.logger.warning("Background listener could not understand the audio.")
-        except sr.RequestError as e:
+        except self.sr.RequestError as e:
             self.logger.error(f"Background listener API request failed: {e}")
+        return None
 
     def listen_on_demand(self):
         if not self.microphone:
             self.logger.error("On-demand listening failed: No microphone available.")
             return None
         try:
-            with self.microphone as source:
+            with self.microphone as source, metrics.span('stt_listen'):
                 self.logger.info("Listening on-demand for voice input...")
                 audio = self.recognizer.listen(source, timeout=7, phrase_time_limit=15)
             self.logger.info("Transcribing on-demand audio...")
-            text = self.recognizer.recognize_google(audio)
+            with metrics.span('stt_recognize'): text = self.recognizer.recognize_google(audio)
             self.logger.info(f"On-demand transcription successful: '{text}'")
             return text
-        except sr.WaitTimeoutError:
+        except self.sr.WaitTimeoutError:
             self.logger.info("On-demand listener: No speech detected.")
             return None
-        except sr.UnknownValueError:
+        except self.sr.UnknownValueError:
             self.logger.warning("On-demand listener could not understand the audio.")
             return None
-        except sr.RequestError as e:
+        except self.sr.RequestError as e:
             self.logger.error(f"On-demand listener API request failed: {e}")
             return None
\ No newline at end of file
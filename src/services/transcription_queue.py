@@ -0,0 +1,118 @@
+#
+# File: src/services/transcription_queue.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from PyQt5.QtCore import QObject, pyqtSignal
+from collections import deque
+import logging
+import threading
+import time
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'merge')
+
+class TranscriptionQueue(QObject):
+    """
+    Bounded queue between the always-on capture thread and speech recognition.
+    Capture only enqueues, so a slow recognize call never delays hearing the
+    next phrase. A small worker pool recognizes phrases; results are delivered
+    in capture order through transcription_ready, which Qt queues onto the
+    receiver's (GUI) thread.
+    """
+    transcription_ready = pyqtSignal(str)
+
+    def __init__(self, recognize, max_pending=4, workers=2, overflow_policy='merge'):
+        super().__init__()
+        self.logger = logging.getLogger("technical")
+        self.recognize = recognize # callable(audio) -> text or None
+        self.max_pending = max(1, max_pending)
+        self.overflow_policy = overflow_policy if overflow_policy in OVERFLOW_POLICIES else 'merge'
+        self.pending = deque() # [sequence, audio, enqueued_at]
+        self.condition = threading.Condition()
+        self.next_sequence = 0; self.next_to_deliver = 0
+        self.finished = {} # sequence -> (text or None, was_recognized), held until earlier items are out
+        self.running = True
+        self.counters = {'submitted': 0, 'dropped': 0, 'merged': 0, 'delivered': 0, 'empty': 0}
+        self.latencies = deque(maxlen=200) # (queue_wait, recognition, total) seconds per item
+        self.threads = [threading.Thread(target=self._worker_loop, name=f"Transcriber-{i}", daemon=True) for i in range(max(1, workers))]
+        for thread in self.threads: thread.start()
+
+    @classmethod
+    def from_settings(cls, recognize, transcription_settings):
+        transcription_settings = transcription_settings or {}
+        return cls(recognize, max_pending=transcription_settings.get('max_pending', 4),
+                   workers=transcription_settings.get('workers', 2),
+                   overflow_policy=transcription_settings.get('overflow_policy', 'merge'))
+
+    def submit(self, audio):
+        """Called from the capture thread; never blocks on recognition."""
+        with self.condition:
+            if not self.running: return
+            self.counters['submitted'] += 1
+            if len(self.pending) >= self.max_pending:
+                if self.overflow_policy == 'drop_newest':
+                    self._skip(self._take_sequence()); self.counters['dropped'] += 1
+                    self.logger.warning("Transcription queue full; dropped newest phrase.")
+                    return
+                if self.overflow_policy == 'merge' and self._merge_into_last(audio):
+                    self.counters['merged'] += 1
+                    return
+                sequence, _, _ = self.pending.popleft(); self._skip(sequence); self.counters['dropped'] += 1
+                self.logger.warning("Transcription queue full; dropped oldest phrase.")
+            self.pending.append([self._take_sequence(), audio, time.monotonic()])
+            self.condition.notify()
+
+    def stop(self):
+        with self.condition:
+            self.running = False; self.pending.clear(); self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            totals = sorted(total for _, _, total in self.latencies)
+            stats = dict(self.counters, pending=len(self.pending))
+        if totals:
+            stats['latency_p50'] = totals[len(totals) // 2]
+            stats['latency_p95'] = totals[min(len(totals) - 1, int(len(totals) * 0.95))]
+        return stats
+
+    def _take_sequence(self):
+        sequence = self.next_sequence; self.next_sequence += 1
+        return sequence
+
+    def _merge_into_last(self, audio):
+        # Consecutive phrases from one speaker become one recognition request instead of being lost.
+        last = self.pending[-1]
+        if last[1].sample_rate != audio.sample_rate or last[1].sample_width != audio.sample_width: return False
+        last[1] = type(audio)(last[1].frame_data + audio.frame_data, audio.sample_rate, audio.sample_width)
+        return True
+
+    def _skip(self, sequence):
+        # Dropped items still occupy a sequence number; mark them done so delivery doesn't stall.
+        self.finished[sequence] = (None, False); self._deliver_ready()
+
+    def _worker_loop(self):
+        while True:
+            with self.condition:
+                while self.running and not self.pending: self.condition.wait()
+                if not self.running: return
+                sequence, audio, enqueued_at = self.pending.popleft()
+            started_at = time.monotonic()
+            try:
+                text = self.recognize(audio)
+            except Exception as e:
+                self.logger.error(f"Transcription worker failed: {e}"); text = None
+            done_at = time.monotonic()
+            with self.condition:
+                if not self.running: return
+                self.latencies.append((started_at - enqueued_at, done_at - started_at, done_at - enqueued_at))
+                self.logger.info(f"Transcription #{sequence}: waited {(started_at - enqueued_at) * 1000:.0f} ms, "
+                                 f"recognized in {(done_at - started_at) * 1000:.0f} ms.")
+                self.finished[sequence] = (text, True); self._deliver_ready()
+
+    def _deliver_ready(self):
+        # Caller holds self.condition.
+        while self.next_to_deliver in self.finished:
+            text, was_recognized = self.finished.pop(self.next_to_deliver); self.next_to_deliver += 1
+            if text: self.counters['delivered'] += 1; self.transcription_ready.emit(text)
+            elif was_recognized: self.counters['empty'] += 1
@@ -0,0 +1,113 @@
+#
+# File: src/services/tts_cache.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+
+class AudioCache:
+    """
+    Content-addressed disk cache for synthesized speech. Files are named by a
+    hash of (provider, voice, model, text) and stored exactly as the provider
+    returned them, so a hit is played back without another API call.
+    Total size is capped; the least recently used files are evicted first.
+    """
+    def __init__(self, cache_dir="cache/tts", max_bytes=100 * 1024 * 1024, extension=".mp3"):
+        self.logger = logging.getLogger("technical")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.lock = threading.Lock()
+        self.index = {} # path -> [size, last_used]
+        self.total_bytes = 0
+        self.hits = 0; self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._scan()
+
+    @classmethod
+    def from_settings(cls, cache_settings, extension=".mp3"):
+        """Returns a configured cache, or None when the audio cache is disabled."""
+        cache_settings = cache_settings or {}
+        if not cache_settings.get('enabled', True): return None
+        try:
+            return cls(cache_dir=cache_settings.get('directory', 'cache/tts'),
+                       max_bytes=int(cache_settings.get('max_megabytes', 100) * 1024 * 1024), extension=extension)
+        except OSError as e:
+            logging.getLogger("technical").warning(f"TTS audio cache disabled: {e}")
+            return None
+
+    @staticmethod
+    def make_key(provider, voice_id, model_id, text):
+        return hashlib.sha256("\x1f".join([provider, voice_id or "", model_id or "", text]).encode('utf-8')).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key + self.extension)
+
+    def get(self, key):
+        """Returns the cached audio bytes for key, or None on a miss."""
+        path = self.path_for(key)
+        with self.lock:
+            entry = self.index.get(path)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[1] = time.time(); self.hits += 1
+        try:
+            with open(path, 'rb') as f:
+                audio_bytes = f.read()
+            os.utime(path, None) # Persist recency so LRU order survives restarts.
+            return audio_bytes
+        except OSError:
+            # File vanished underneath us; forget it and treat as a miss.
+            with self.lock: self._forget(path)
+            return None
+
+    def put(self, key, audio_bytes):
+        path = self.path_for(key)
+        try:
+            # Write next to the target and rename, so readers never see a partial file.
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio_bytes)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self.logger.warning(f"Could not write TTS cache entry: {e}")
+            return
+        with self.lock:
+            self._forget(path)
+            self.index[path] = [len(audio_bytes), time.time()]; self.total_bytes += len(audio_bytes)
+            self._evict()
+
+    def stats(self):
+        with self.lock:
+            return {'files': len(self.index), 'bytes': self.total_bytes, 'hits': self.hits, 'misses': self.misses}
+
+    def _scan(self):
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith('.part'):
+                try: os.remove(path)
+                except OSError: pass
+                continue
+            if not name.endswith(self.extension): continue
+            stat = os.stat(path)
+            self.index[path] = [stat.st_size, stat.st_mtime]; self.total_bytes += stat.st_size
+        with self.lock: self._evict()
+
+    def _forget(self, path):
+        entry = self.index.pop(path, None)
+        if entry: self.total_bytes -= entry[0]
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes: return
+        for path, _ in sorted(self.index.items(), key=lambda item: item[1][1]):
+            if self.total_bytes <= self.max_bytes: break
+            self._forget(path)
+            try: os.remove(path)
+            except OSError as e: self.logger.warning(f"Could not evict TTS cache file {path}: {e}")
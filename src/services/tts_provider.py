@@ -4,21 +4,27 @@
 # ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
 #
 
-import pyttsx3
-from elevenlabs.client import ElevenLabs
-from elevenlabs import play
+from src.core.startup_timing import timed_import
+from src.services.audio_sink import StreamingClip, audio_sink
+from src.services.http_pool import http_pool
+from src.services.tts_cache import AudioCache
 import logging
-import threading
 
 class TTSProvider:
+    ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"
+    SETTINGS_KEYS = ('voice.tts_provider', 'voice.elevenlabs_settings', 'voice.local_tts_settings',
+                     'voice.audio_cache', 'voice.audio_sink', 'ai.elevenlabs_api_key', 'network')
+
     @staticmethod
     def list_local_voices():
-        """Returns a list of available local TTS voices."""
+        """
+        Returns a list of available local TTS voices. Only for when no local
+        provider is live: pyttsx3.init() hands back an existing engine, which
+        must only be used from the thread that speaks with it (local_voices()).
+        """
         try:
-            engine = pyttsx3.init()
-            voices = engine.getProperty('voices')
-            engine.stop() # Necessary to release the engine
-            return voices
+            # No stop(): on a shared engine it would cut off speech; a throwaway one is released when dropped.
+            return timed_import('pyttsx3').init().getProperty('voices')
         except Exception as e:
             logging.getLogger("technical").error(f"Could not list local voices: {e}")
             return []
@@ -29,70 +35,127 @@ class TTSProvider:
         self.provider = self.config.get('tts_provider', 'elevenlabs')
         self.elevenlabs_client = None
         self.local_engine = None
+        self.audio_cache = None
+        self.streaming = False # raw PCM into the in-process sink, instead of MP3 through elevenlabs.play()
+        self.playback_generation = 0; self.local_generation = None # stop_playback() bumps the former
 
         if self.provider == 'elevenlabs':
             if not elevenlabs_api_key or "MYAPIKEY" in elevenlabs_api_key:
                 self.logger.warning("ElevenLabs API key is missing. TTS will not work.")
             else:
                 try:
-                    self.elevenlabs_client = ElevenLabs(api_key=elevenlabs_api_key)
+                    self.elevenlabs_client = http_pool.elevenlabs_client(elevenlabs_api_key)
+                    audio_sink.configure(self.config.get('audio_sink'))
+                    self.streaming = audio_sink.is_available()
+                    self.audio_cache = AudioCache.from_settings(self.config.get('audio_cache'), extension=".pcm" if self.streaming else ".mp3")
                     self.logger.info("TTS Provider initialized for ElevenLabs.")
                 except Exception as e:
                     self.logger.error(f"Failed to initialize ElevenLabs client: {e}")
         
         elif self.provider == 'local':
             try:
-                self.local_engine = pyttsx3.init()
+                self.local_engine = timed_import('pyttsx3').init()
                 local_voice_id = self.config.get('local_tts_settings', {}).get('voice_id')
                 if local_voice_id:
                     self.local_engine.setProperty('voice', local_voice_id)
+                self.local_engine.connect('started-word', self._on_local_word)
                 self.logger.info("TTS Provider initialized for Local System Voice.")
             except Exception as e:
                 self.logger.error(f"Failed to initialize local TTS engine: {e}")
                 self.local_engine = None
 
-    def speak(self, text):
-        """Speaks text using the configured TTS engine."""
+    def local_voices(self):
+        """Voices from this provider's own engine; call it on the thread that plays (AudioOutput.call)."""
+        return self.local_engine.getProperty('voices')
+
+    def is_available(self):
+        return (self.provider == 'elevenlabs' and self.elevenlabs_client is not None) or \
+               (self.provider == 'local' and self.local_engine is not None)
+
+    def synthesize(self, text):
+        """
+        Produces playable audio for text without playing it, so a caller can
+        synthesize ahead of playback. Returns None on failure.
+        """
         if self.provider == 'elevenlabs' and self.elevenlabs_client:
-            return self._speak_elevenlabs(text)
+            return self._synthesize_elevenlabs(text)
         elif self.provider == 'local' and self.local_engine:
-            return self._speak_local(text)
-        else:
-            self.logger.warning(f"TTS provider '{self.provider}' not available or configured correctly. Skipping speech.")
-            return True # Return true to not trigger a UI error
+            # pyttsx3 renders while it speaks; the "audio" is the text itself.
+            return text
+        return None
+
+    def play_audio(self, audio, still_wanted=None):
+        """
+        Blocking playback of audio returned by synthesize(). still_wanted() is
+        checked just before playing starts, so a stop_playback() that came
+        first isn't lost.
+        """
+        generation = self.playback_generation
+        try:
+            if isinstance(audio, StreamingClip):
+                return audio_sink.play(audio, still_wanted)
+            if still_wanted and not still_wanted(): return False
+            if self.provider == 'elevenlabs':
+                timed_import('elevenlabs').play(audio)
+            else:
+                # stop() before runAndWait() is a no-op in pyttsx3; the word callback catches a stop from here on.
+                self.local_generation = generation
+                self.local_engine.say(audio)
+                self.local_engine.runAndWait()
+            return True
+        except Exception as e:
+            self.logger.error(f"TTS playback failed: {e}")
+            return False
 
-    def _speak_elevenlabs(self, text):
+    def stop_playback(self):
+        """Interrupts speech in progress, where the engine supports it."""
+        self.playback_generation += 1
+        if self.provider == 'local' and self.local_engine:
+            try: self.local_engine.stop()
+            except Exception as e: self.logger.warning(f"Could not stop local TTS engine: {e}")
+        elif self.streaming: audio_sink.stop()
+        # Without the in-process sink, elevenlabs.play() runs an external player we can't reach; that chunk plays out.
+
+    def _on_local_word(self, name, location, length):
+        # pyttsx3 calls this on the thread inside runAndWait(), where stopping is safe.
+        if self.local_generation != self.playback_generation: self.local_engine.stop()
+
+    def _synthesize_elevenlabs(self, text):
         sanitized_text = text.replace('"', '')
-        self.logger.info(f"[TTS-ElevenLabs] Requesting audio for: '{sanitized_text}'")
+        voice_id = self.config.get('elevenlabs_settings', {}).get('voice_id')
+        # The device is only opened on first playback; if that failed, later chunks go back to MP3.
+        streaming = self.streaming and audio_sink.is_available()
+        output_format = audio_sink.output_format if streaming else None
+        cache_key = AudioCache.make_key('elevenlabs', voice_id, f"{self.ELEVENLABS_MODEL_ID}/{output_format}" if output_format else self.ELEVENLABS_MODEL_ID, sanitized_text)
+        audio_cache = self.audio_cache if streaming == self.streaming else None # the cache holds one format
+        if audio_cache:
+            cached_audio = audio_cache.get(cache_key)
+            if cached_audio is not None:
+                self.logger.info("[TTS-ElevenLabs] Audio cache hit.")
+                return StreamingClip.from_bytes(cached_audio) if streaming else cached_audio
+        self.logger.info(f"[TTS-ElevenLabs] Synthesizing chunk: '{sanitized_text}'")
         try:
-            voice_id = self.config.get('elevenlabs_settings', {}).get('voice_id')
+            if streaming:
+                audio = self.elevenlabs_client.text_to_speech.stream(
+                    text=sanitized_text, voice_id=voice_id, model_id=self.ELEVENLABS_MODEL_ID, output_format=output_format)
+                # The rest of the clip keeps downloading in the background while earlier audio plays.
+                clip = StreamingClip(audio, on_complete=(lambda data: audio_cache.put(cache_key, data)) if audio_cache else None)
+                clip.wait_for_data(http_pool.timeout[1])
+                if clip.error is not None or (clip.done and not clip.pending):
+                    if clip.error is None: self.logger.error("ElevenLabs TTS Error: Audio generation returned nothing.")
+                    return None
+                return clip
             audio = self.elevenlabs_client.text_to_speech.stream(
                 text=sanitized_text,
                 voice_id=voice_id,
-                model_id="eleven_multilingual_v2" 
+                model_id=self.ELEVENLABS_MODEL_ID
             )
-            if audio:
-                play(audio)
-                return True
-            else:
+            audio_bytes = b"".join(audio) if audio else b""
+            if not audio_bytes:
                 self.logger.error("ElevenLabs TTS Error: Audio generation returned nothing.")
-                return False
+                return None
+            if audio_cache: audio_cache.put(cache_key, audio_bytes)
+            return audio_bytes
         except Exception as e:
             self.logger.error(f"Error calling ElevenLabs API: {e}")
-            return False
-
-    def _speak_local(self, text):
-        self.logger.info(f"[TTS-Local] Speaking: '{text}'")
-        try:
-            # pyttsx3's runAndWait is blocking, so we run it in a thread
-            # to avoid freezing the UI.
-            def run_tts():
-                self.local_engine.say(text)
-                self.local_engine.runAndWait()
-
-            tts_thread = threading.Thread(target=run_tts)
-            tts_thread.start()
-            return True
-        except Exception as e:
-            self.logger.error(f"Local TTS engine failed: {e}")
-            return False
\ No newline at end of file
+            return None
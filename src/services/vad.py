@@ -0,0 +1,91 @@
+#
+# File: src/services/vad.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+import logging
+import threading
+import numpy as np
+
+class VoiceActivityDetector:
+    """
+    Frame-level voice activity detection on raw 16-bit PCM, vectorized with
+    NumPy. A frame counts as speech when it is loud enough relative to the
+    tracked noise floor, has a voice-like zero-crossing rate and a peaky
+    (non-flat) spectrum. Speech flags are smoothed with a hangover, and a
+    segment is accepted only if it holds enough speech overall.
+    """
+    def __init__(self, sample_rate=16000, frame_ms=30, margin_db=12.0, min_energy_db=-50.0,
+                 zcr_range=(0.01, 0.30), max_flatness=0.45, hangover_ms=240, min_speech_ms=210):
+        self.logger = logging.getLogger("technical")
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.zcr_low, self.zcr_high = zcr_range
+        self.max_flatness = max_flatness
+        self.hangover_frames = max(0, int(hangover_ms / frame_ms))
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.noise_floor_db = None
+        self.window = np.hanning(self.frame_length).astype(np.float32)
+        self.lock = threading.Lock()
+        self.frames_processed = 0; self.segments_accepted = 0; self.segments_rejected = 0
+
+    @classmethod
+    def from_settings(cls, vad_settings):
+        """Returns a detector, or None when VAD is disabled."""
+        vad_settings = vad_settings or {}
+        if not vad_settings.get('enabled', True): return None
+        return cls(margin_db=vad_settings.get('margin_db', 12.0),
+                   min_speech_ms=vad_settings.get('min_speech_ms', 210),
+                   hangover_ms=vad_settings.get('hangover_ms', 240))
+
+    def frame_features(self, samples):
+        """Per-frame (energy_db, zero_crossing_rate, spectral_flatness) for int16 samples."""
+        frame_count = len(samples) // self.frame_length
+        frames = samples[:frame_count * self.frame_length].astype(np.float32).reshape(frame_count, self.frame_length) / 32768.0
+        energy_db = 10.0 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_length - 1)
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, zcr, flatness
+
+    def speech_flags(self, samples):
+        """Boolean speech decision per frame, after hangover smoothing."""
+        energy_db, zcr, flatness = self.frame_features(samples)
+        if energy_db.size == 0: return np.zeros(0, dtype=bool)
+        # The quietest tenth of a segment is a decent running estimate of the background level.
+        segment_floor = float(np.percentile(energy_db, 10))
+        with self.lock:
+            self.noise_floor_db = segment_floor if self.noise_floor_db is None else min(segment_floor, 0.9 * self.noise_floor_db + 0.1 * segment_floor)
+            threshold_db = max(self.min_energy_db, self.noise_floor_db + self.margin_db)
+        raw = (energy_db > threshold_db) & (zcr >= self.zcr_low) & (zcr <= self.zcr_high) & (flatness <= self.max_flatness)
+        if self.hangover_frames:
+            # Keep a frame "speech" for hangover_frames after the last raw speech frame.
+            raw = np.convolve(raw.astype(np.int32), np.ones(self.hangover_frames + 1, dtype=np.int32))[:raw.size] > 0
+        return raw
+
+    def is_speech(self, pcm_bytes):
+        """Classifies a whole segment of 16-bit mono PCM at self.sample_rate."""
+        samples = np.frombuffer(pcm_bytes, dtype=np.int16)
+        flags = self.speech_flags(samples)
+        # A smoothed run is the raw speech span plus the trailing hangover; don't count the hangover.
+        accepted = bool(flags.size) and self._longest_run(flags) - self.hangover_frames >= self.min_speech_frames
+        with self.lock:
+            self.frames_processed += flags.size
+            if accepted: self.segments_accepted += 1
+            else: self.segments_rejected += 1
+        return accepted
+
+    @staticmethod
+    def _longest_run(flags):
+        edges = np.diff(np.concatenate(([0], flags.astype(np.int8), [0])))
+        starts = np.flatnonzero(edges == 1); ends = np.flatnonzero(edges == -1)
+        return int((ends - starts).max()) if starts.size else 0
+
+    def stats(self):
+        with self.lock:
+            return {'frames_processed': self.frames_processed, 'segments_accepted': self.segments_accepted,
+                    'segments_rejected': self.segments_rejected, 'noise_floor_db': self.noise_floor_db}
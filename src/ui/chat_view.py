@@ -0,0 +1,148 @@
+#
+# File: src/ui/chat_view.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from PyQt5.QtWidgets import QListView, QStyledItemDelegate, QAbstractItemView
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QSize
+from PyQt5.QtGui import QTextDocument
+import math
+
+def format_message_html(role, content):
+    content = content.replace('\n', '<br/>')
+    if role == 'assistant': return f"<div style='color: #aaddff; padding-bottom: 8px;'><b>Companion:</b><br/>{content}</div>"
+    elif role == 'user': return f"<div style='color: #ffffff; padding-bottom: 8px;'><b>You:</b><br/>{content}</div>"
+    else: return f"<div style='color: #cccccc; padding-bottom: 8px;'><i>{content}</i></div>"
+
+class ChatModel(QAbstractListModel):
+    """
+    The chat transcript as a list of message dicts, capped at max_messages
+    (oldest dropped first). A transient status line ("Thinking...") is
+    replaced by whatever comes next instead of staying in the scrollback.
+    """
+    def __init__(self, max_messages=200, parent=None):
+        super().__init__(parent)
+        self.max_messages = max(1, max_messages)
+        self.messages = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        message = self.messages[index.row()]
+        if role == Qt.DisplayRole: return message['content']
+        return None
+
+    def message_at(self, row):
+        # The delegate reads the dict directly; going through data() would hand back a converted copy.
+        return self.messages[row]
+
+    def set_max_messages(self, max_messages):
+        self.max_messages = max(1, max_messages)
+        overflow = len(self.messages) - self.max_messages
+        if overflow > 0:
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1); del self.messages[:overflow]; self.endRemoveRows()
+
+    def append(self, message):
+        message = {'role': message.get('role'), 'content': message.get('content', ''), 'transient': message.get('transient', False)}
+        if self.messages and self.messages[-1]['transient']:
+            self.messages[-1] = message; self._changed(len(self.messages) - 1); return
+        if len(self.messages) >= self.max_messages:
+            overflow = len(self.messages) - self.max_messages + 1
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1); del self.messages[:overflow]; self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), len(self.messages), len(self.messages))
+        self.messages.append(message); self.endInsertRows()
+
+    def update_last(self, content):
+        if not self.messages: return
+        last = self.messages[-1]
+        # The laid-out size carries over so the view can tell whether the row actually grew.
+        self.messages[-1] = {'role': last['role'], 'content': content, 'transient': last['transient'],
+                             '_layout_size': last.get('_layout_size')}
+        self._changed(len(self.messages) - 1)
+
+    def clear(self):
+        self.beginResetModel(); self.messages = []; self.endResetModel()
+
+    def _changed(self, row):
+        index = self.index(row); self.dataChanged.emit(index, index)
+
+class ChatDelegate(QStyledItemDelegate):
+    """Renders one message bubble as rich text; the laid-out document is cached per message and width."""
+    STYLE = "body { color: white; font-size: 14px; }"
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+
+    def text_width(self):
+        return max(50, self.view.viewport().width())
+
+    def _document(self, message):
+        width = self.text_width()
+        cached = message.get('_document')
+        if cached and cached[0] == width: return cached[1]
+        document = QTextDocument(); document.setDefaultStyleSheet(self.STYLE)
+        document.setHtml(format_message_html(message['role'], message['content'])); document.setTextWidth(width)
+        # Message dicts are replaced on every content change, so a cached document never goes stale.
+        message['_document'] = (width, document)
+        return document
+
+    def layout_size(self, message):
+        return (self.text_width(), math.ceil(self._document(message).size().height()))
+
+    def sizeHint(self, option, index):
+        width, height = self.layout_size(index.model().message_at(index.row()))
+        return QSize(width, height)
+
+    def paint(self, painter, option, index):
+        painter.save(); painter.translate(option.rect.topLeft())
+        self._document(index.model().message_at(index.row())).drawContents(painter)
+        painter.restore()
+
+class ChatView(QListView):
+    """A list view over ChatModel: only bubbles in the viewport are painted."""
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.delegate = ChatDelegate(self); self.changed_rows = set()
+        self.setModel(model); self.setItemDelegate(self.delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setSelectionMode(QAbstractItemView.NoSelection); self.setFocusPolicy(Qt.NoFocus)
+        self.setResizeMode(QListView.Adjust)
+        self.setStyleSheet("""
+            QListView { background-color: transparent; border: none; }
+            QScrollBar:vertical { border: none; background: rgba(0,0,0,0.3); width: 10px; margin: 0px 0px 0px 0px; }
+            QScrollBar::handle:vertical { background: rgba(255,255,255,0.4); min-height: 20px; border-radius: 5px; }
+            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical { height: 0px; }
+            QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical { background: none; }
+        """)
+
+    def is_at_bottom(self):
+        scroll_bar = self.verticalScrollBar()
+        return scroll_bar.value() >= scroll_bar.maximum() - 4
+
+    def rowsInserted(self, parent, start, end):
+        super().rowsInserted(parent, start, end)
+        model = self.model()
+        for row in range(start, end + 1): model.message_at(row)['_layout_size'] = self.delegate.layout_size(model.message_at(row))
+
+    def dataChanged(self, top_left, bottom_right, roles=()):
+        # QListView's own handler lays out every row again, even when nothing moved. Here a changed
+        # bubble is only repainted (which visits just the visible rows); relayout_and_follow()
+        # asks for a layout if its size changed. visualRect() isn't used: it would query the new size.
+        self.changed_rows.update(range(top_left.row(), bottom_right.row() + 1)); self.viewport().update()
+
+    def relayout_and_follow(self, follow):
+        # The list is laid out again (every row, in QListView) only when a changed bubble's
+        # size differs from the one it was last laid out with.
+        rows, self.changed_rows = self.changed_rows, set()
+        model = self.model(); resized = None
+        for row in sorted(rows):
+            if row >= model.rowCount(): continue
+            message = model.message_at(row); size = self.delegate.layout_size(message)
+            if size != message.get('_layout_size'): message['_layout_size'] = size; resized = row
+        if resized is not None: self.delegate.sizeHintChanged.emit(model.index(resized))
+        if follow: self.scrollToBottom()
@@ -4,9 +4,11 @@
 # ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
 #
 
-from PyQt5.QtWidgets import QWidget, QMenu, QApplication, QLineEdit, QPushButton, QTextBrowser, QVBoxLayout
+from PyQt5.QtWidgets import QWidget, QMenu, QApplication, QLineEdit, QPushButton, QVBoxLayout
 from PyQt5.QtCore import Qt, QPoint, pyqtSignal, QTimer, QSize
 from PyQt5.QtGui import QPainter, QColor, QBrush, QPen, QFont
+from src.core.metrics import metrics
+from src.ui.chat_view import ChatModel, ChatView
 
 class OverlayWindow(QWidget):
     state_toggled = pyqtSignal(bool)
@@ -21,6 +23,7 @@ class OverlayWindow(QWidget):
         self.is_chat_mode = False
         self.has_tts_error = False
         self.is_listening = False
+        self.ai_readiness = 'ready'
         self.settings_window = None
         
         self.setWindowFlags(Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint | Qt.Tool)
@@ -33,16 +36,9 @@ class OverlayWindow(QWidget):
         self.chat_layout.setContentsMargins(10, 10, 10, 10)
         self.setLayout(self.chat_layout)
 
-        self.chat_history_view = QTextBrowser(self)
-        self.chat_history_view.setReadOnly(True)
-        self.chat_history_view.setOpenExternalLinks(True)
-        self.chat_history_view.setStyleSheet("""
-            QTextBrowser { background-color: transparent; border: none; color: white; font-size: 14px; }
-            QScrollBar:vertical { border: none; background: rgba(0,0,0,0.3); width: 10px; margin: 0px 0px 0px 0px; }
-            QScrollBar::handle:vertical { background: rgba(255,255,255,0.4); min-height: 20px; border-radius: 5px; }
-            QScrollBar::add-line:vertical, QScrollBar::sub-line:vertical { height: 0px; }
-            QScrollBar::add-page:vertical, QScrollBar::sub-page:vertical { background: none; }
-        """)
+        # Scrollback is capped; the view only paints the bubbles that are on screen.
+        self.chat_model = ChatModel(max_messages=settings.get('ui', {}).get('chat_scrollback', 200), parent=self)
+        self.chat_history_view = ChatView(self.chat_model, self)
         self.chat_history_view.hide()
 
         self.input_field = QLineEdit(self)
@@ -64,6 +60,14 @@ class OverlayWindow(QWidget):
         self.inactivity_timer.timeout.connect(self.hide_message)
         self.inactivity_timeout_ms = 45000
 
+        # Messages arriving within one frame are applied to the model together, then scrolled once.
+        # A streaming reply updates its bubble in place; only the newest partial text per frame is kept.
+        self.pending_updates = []; self.is_streaming = False
+        self.update_flush_timer = QTimer(self)
+        self.update_flush_timer.setSingleShot(True)
+        self.update_flush_timer.timeout.connect(self._flush_updates)
+        self.update_flush_interval_ms = 16
+
         self.old_pos = self.pos()
 
     # --- NEW METHOD to dynamically style the mic button ---
@@ -89,11 +93,20 @@ class OverlayWindow(QWidget):
     def update_tts_status(self, is_ok):
         self.has_tts_error = not is_ok; self.update()
 
+    def update_ai_readiness(self, readiness):
+        if readiness == self.ai_readiness: return
+        was_warming = self.ai_readiness == 'warming'; self.ai_readiness = readiness
+        if readiness == 'warming' and self.is_chat_mode:
+            self.append_message({'role': 'system', 'content': "<i>Warming up the model...</i>", 'transient': True})
+        elif was_warming and readiness == 'unavailable' and self.is_chat_mode:
+            self.append_message({'role': 'system', 'content': "<i>The model could not be loaded.</i>"})
+        self.update()
+
     def update_listening_status(self, is_listening):
         self.is_listening = is_listening
         self.update_mic_style() # Update the mic color
         if is_listening:
-            self.append_message({'role': 'system', 'content': "<i>Listening...</i>"})
+            self.append_message({'role': 'system', 'content': "<i>Listening...</i>", 'transient': True})
         self.update()
 
     def paintEvent(self, event):
@@ -105,7 +118,8 @@ class OverlayWindow(QWidget):
         else:
             text = "On"
             if not self.is_on: base_color = QColor(200, 40, 40); text = "Off"
-            elif self.has_tts_error: base_color = QColor(220, 180, 0); text = "Warn"
+            elif self.ai_readiness == 'warming': base_color = QColor(90, 90, 160); text = "..."
+            elif self.has_tts_error or self.ai_readiness == 'unavailable': base_color = QColor(220, 180, 0); text = "Warn"
             else: base_color = QColor(0, 80, 200)
             base_color.setAlpha(220 if self.underMouse() else 180)
             painter.setBrush(QBrush(base_color)); painter.setPen(QPen(Qt.NoPen))
@@ -141,21 +155,42 @@ class OverlayWindow(QWidget):
             self.settings_window = SettingsWindow(self.settings, self.core_service, self)
         self.settings_window.show(); self.settings_window.activateWindow()
 
+    def apply_ui_settings(self, ui_settings):
+        self.chat_model.set_max_messages(ui_settings.get('chat_scrollback', 200))
+
     def clear_chat_display(self):
-        self.chat_history_view.clear()
+        self.update_flush_timer.stop(); self.pending_updates = []; self.is_streaming = False
+        self.chat_model.clear()
 
     def append_message(self, message_data):
-        role = message_data.get('role'); content = message_data.get('content', '').replace('\n', '<br/>')
-        if not self.is_chat_mode: self.enter_chat_mode()
-        
-        if role == 'assistant': html = f"<div style='color: #aaddff; padding-bottom: 8px;'><b>Companion:</b><br/>{content}</div>"
-        elif role == 'user': html = f"<div style='color: #ffffff; padding-bottom: 8px;'><b>You:</b><br/>{content}</div>"
-        else: html = f"<div style='color: #cccccc; padding-bottom: 8px;'><i>{content}</i></div>"
-        
-        self.chat_history_view.append(html)
-        self.chat_history_view.verticalScrollBar().setValue(self.chat_history_view.verticalScrollBar().maximum())
+        with metrics.span('ui_append_message', message_data.get('turn_id')):
+            if not self.is_chat_mode: self.enter_chat_mode()
+            if message_data.get('partial') and self.pending_updates and self.pending_updates[-1].get('partial'):
+                self.pending_updates[-1] = message_data # superseded before it was ever shown
+            else:
+                self.pending_updates.append(message_data)
+            if not self.update_flush_timer.isActive(): self.update_flush_timer.start(self.update_flush_interval_ms)
+
+    def _flush_updates(self):
+        if not self.pending_updates: return
+        updates, self.pending_updates = self.pending_updates, []
+        with metrics.span('ui_flush_updates', updates[-1].get('turn_id')):
+            follow = self.chat_history_view.is_at_bottom()
+            for message_data in updates: self._apply_message(message_data)
+            self.chat_history_view.relayout_and_follow(follow)
         self.inactivity_timer.start(self.inactivity_timeout_ms)
 
+    def _apply_message(self, message_data):
+        role = message_data.get('role'); content = message_data.get('content', '')
+        if message_data.get('partial'):
+            if self.is_streaming: self.chat_model.update_last(content)
+            else: self.chat_model.append({'role': 'assistant', 'content': content}); self.is_streaming = True
+        elif role == 'assistant' and self.is_streaming:
+            self.chat_model.update_last(content); self.is_streaming = False
+        else:
+            # Anything else while a reply is streaming means that reply was abandoned; it stays as-is.
+            self.is_streaming = False; self.chat_model.append(message_data)
+
     def display_manual_prompt(self):
         self.clear_chat_display(); self.append_message({'role': 'system', 'content': "What's on your mind?"})
 
@@ -183,4 +218,4 @@ class OverlayWindow(QWidget):
         if user_text:
             self.inactivity_timer.stop(); self.append_message({'role': 'user', 'content': user_text})
             self.user_message_sent.emit(user_text)
-            self.input_field.clear(); self.append_message({'role': 'system', 'content': "<i>Thinking...</i>"})
\ No newline at end of file
+            self.input_field.clear(); self.append_message({'role': 'system', 'content': "<i>Thinking...</i>", 'transient': True})
\ No newline at end of file
@@ -4,13 +4,12 @@
 # ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
 #
 
-from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QTabWidget, QWidget, QFormLayout, 
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QTabWidget, QWidget, QFormLayout, 
                              QLineEdit, QCheckBox, QSlider, QLabel, QPushButton, QTextEdit,
                              QGroupBox, QComboBox)
 from PyQt5.QtCore import Qt, pyqtSignal
 from src.core.settings_manager import save_settings
-from src.services.stt_provider import STTProvider
-from src.services.tts_provider import TTSProvider
+from src.services.device_inventory import DeviceInventory
 import copy
 
 class SettingsWindow(QDialog):
@@ -88,16 +87,13 @@ class SettingsWindow(QDialog):
     def create_audio_tab(self):
         tab = QWidget(); layout = QVBoxLayout(tab)
         input_group = QGroupBox("Audio Input (Microphone)"); input_layout = QFormLayout(input_group)
+        # Device lists are filled in by the inventory service; slow enumeration never blocks the dialog.
         self.mic_selector = QComboBox()
-        self.local_voices = [] 
-        try:
-            self.mic_selector.addItems(STTProvider.list_microphones())
-            saved_index = self.settings.get('audio_input', {}).get('mic_device_index')
-            if saved_index is not None and 0 <= saved_index < self.mic_selector.count(): self.mic_selector.setCurrentIndex(saved_index)
-            elif self.mic_selector.count() > 0: self.mic_selector.setCurrentIndex(0)
-        except Exception as e:
-            self.mic_selector.addItem("Error"); self.mic_selector.setEnabled(False)
-        input_layout.addRow("Input Device:", self.mic_selector)
+        self.local_voices = []; self.devices_loaded = False
+        self.refresh_devices_button = QPushButton("Refresh Devices")
+        self.refresh_devices_button.clicked.connect(self.refresh_devices)
+        mic_row = QHBoxLayout(); mic_row.addWidget(self.mic_selector, 1); mic_row.addWidget(self.refresh_devices_button)
+        input_layout.addRow("Input Device:", mic_row)
         self.always_on_checkbox = QCheckBox(); self.always_on_checkbox.setChecked(self.settings.get('audio_input', {}).get('always_on_listening', False))
         input_layout.addRow('Enable "Always-On" Listening:', self.always_on_checkbox)
         layout.addWidget(input_group)
@@ -111,21 +107,52 @@ class SettingsWindow(QDialog):
         output_layout.addRow(self.elevenlabs_voice_id_label, self.elevenlabs_voice_id_input)
         self.local_voice_selector = QComboBox()
         self.local_voice_label = QLabel("Local Voice:")
-        try:
-            self.local_voices = TTSProvider.list_local_voices()
-            voice_names = [v.name for v in self.local_voices]
-            self.local_voice_selector.addItems(voice_names)
-            saved_local_voice_id = self.settings.get('voice', {}).get('local_tts_settings', {}).get('voice_id')
-            if saved_local_voice_id:
-                for i, voice in enumerate(self.local_voices):
-                    if voice.id == saved_local_voice_id: self.local_voice_selector.setCurrentIndex(i); break
-        except Exception as e:
-            self.local_voice_selector.addItem("Error"); self.local_voice_selector.setEnabled(False)
         output_layout.addRow(self.local_voice_label, self.local_voice_selector)
         self.tts_provider_selector.currentTextChanged.connect(self.toggle_tts_settings_visibility)
         self.toggle_tts_settings_visibility(self.settings.get('voice',{}).get('tts_provider', 'elevenlabs').capitalize())
         self.tts_provider_selector.setCurrentText(self.settings.get('voice',{}).get('tts_provider', 'elevenlabs').capitalize())
         layout.addWidget(output_group); layout.addStretch(); self.tabs.addTab(tab, "Audio")
+
+        inventory = DeviceInventory.instance()
+        inventory.inventory_updated.connect(self.populate_audio_devices)
+        if inventory.snapshot() is not None: self.populate_audio_devices(inventory.snapshot())
+        else: self._show_device_placeholders(); inventory.ensure_loaded()
+
+    def _show_device_placeholders(self):
+        # Until the new list arrives, save_and_close must keep the saved microphone and voice.
+        self.devices_loaded = False; self.local_voices = []
+        for selector in (self.mic_selector, self.local_voice_selector):
+            selector.clear(); selector.addItem("Loading..."); selector.setEnabled(False)
+        self.refresh_devices_button.setEnabled(False)
+
+    def refresh_devices(self):
+        self._show_device_placeholders(); DeviceInventory.instance().refresh()
+
+    def populate_audio_devices(self, inventory):
+        self.devices_loaded = True; self.refresh_devices_button.setEnabled(True)
+        self.mic_selector.clear()
+        if 'microphones' in inventory['errors']:
+            self.mic_selector.addItem("Error"); self.mic_selector.setEnabled(False)
+        else:
+            self.mic_selector.addItems(inventory['microphones']); self.mic_selector.setEnabled(True)
+            saved_index = self.settings.get('audio_input', {}).get('mic_device_index')
+            if saved_index is not None and 0 <= saved_index < self.mic_selector.count(): self.mic_selector.setCurrentIndex(saved_index)
+            elif self.mic_selector.count() > 0: self.mic_selector.setCurrentIndex(0)
+        self.local_voice_selector.clear(); self.local_voices = inventory['local_voices']
+        if 'local_voices' in inventory['errors']:
+            self.local_voice_selector.addItem("Error"); self.local_voice_selector.setEnabled(False)
+        else:
+            self.local_voice_selector.addItems([name for _, name in self.local_voices]); self.local_voice_selector.setEnabled(True)
+            saved_local_voice_id = self.settings.get('voice', {}).get('local_tts_settings', {}).get('voice_id')
+            if saved_local_voice_id:
+                for i, (voice_id, _) in enumerate(self.local_voices):
+                    if voice_id == saved_local_voice_id: self.local_voice_selector.setCurrentIndex(i); break
+
+    def showEvent(self, event):
+        super().showEvent(event); DeviceInventory.instance().set_watching(True)
+
+    def hideEvent(self, event):
+        DeviceInventory.instance().set_watching(False); super().hideEvent(event)
         
     def toggle_tts_settings_visibility(self, provider_name):
         is_local = provider_name.lower() == "local"
@@ -170,10 +197,12 @@ class SettingsWindow(QDialog):
         s['voice']['elevenlabs_settings']['voice_id'] = self.elevenlabs_voice_id_input.text()
         
         selected_local_index = self.local_voice_selector.currentIndex()
-        if self.local_voices and selected_local_index < len(self.local_voices):
-            s['voice']['local_tts_settings']['voice_id'] = self.local_voices[selected_local_index].id
+        if self.local_voices and 0 <= selected_local_index < len(self.local_voices):
+            s['voice']['local_tts_settings']['voice_id'] = self.local_voices[selected_local_index][0]
         
-        s['audio_input']['mic_device_index'] = self.mic_selector.currentIndex() if self.mic_selector.isEnabled() else None
+        # While devices are still loading, keep the saved microphone rather than clearing it.
+        if self.devices_loaded:
+            s['audio_input']['mic_device_index'] = self.mic_selector.currentIndex() if self.mic_selector.isEnabled() else None
         s['audio_input']['always_on_listening'] = self.always_on_checkbox.isChecked()
         
         s['ai_personality']['system_prompt'] = self.system_prompt_input.toPlainText()
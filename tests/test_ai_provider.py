@@ -0,0 +1,66 @@
+#
+# File: tests/test_ai_provider.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from benchmarks.mock_ollama import MockOllamaServer
+from src.services.ai_provider import AIProvider, AIResponseError
+import threading
+import time
+import unittest
+
+class AbortTest(unittest.TestCase):
+    def setUp(self):
+        self.server = MockOllamaServer(first_token_delay_ms=4000, token_delay_ms=1, jitter_ms=0).start()
+        self.provider = AIProvider({'provider': 'ollama', 'ollama_settings': {'host': self.server.url, 'model': 'mock'}})
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_abort_releases_a_read_waiting_for_the_first_token(self):
+        stream = self.provider.stream_response([{'role': 'user', 'content': 'hi'}])
+        threading.Timer(0.2, stream.abort).start()
+        started_at = time.monotonic(); deltas = list(stream)
+        self.assertLess(time.monotonic() - started_at, 2)
+        self.assertEqual(deltas, []) # no error message for a deliberate abort
+        self.assertIsNone(stream.error)
+
+    def test_provider_still_answers_after_an_abort(self):
+        stream = self.provider.stream_response([{'role': 'user', 'content': 'hi'}])
+        threading.Timer(0.2, stream.abort).start(); list(stream)
+        self.server.first_token_delay = 0
+        reply = self.provider.get_response([{'role': 'user', 'content': 'hi'}])
+        self.assertTrue(reply.endswith("."))
+
+class FailureTest(unittest.TestCase):
+    def setUp(self):
+        self.server = MockOllamaServer(first_token_delay_ms=0, token_delay_ms=0, jitter_ms=0).start()
+        self.provider = AIProvider({'provider': 'ollama', 'ollama_settings': {'host': self.server.url, 'model': 'mock'}})
+
+    def tearDown(self):
+        self.server.stop()
+
+    def fail_with(self, mode):
+        draw = self.server.draw
+        self.server.draw = lambda: (mode, draw()[1])
+
+    def test_failure_mid_reply_ends_the_stream_without_the_error_text(self):
+        self.fail_with('stream_error')
+        stream = self.provider.stream_response([{'role': 'user', 'content': 'hi'}]); reply = "".join(stream)
+        self.assertTrue(reply); self.assertNotIn("error", reply)
+        self.assertTrue(stream.interrupted); self.assertIsNotNone(stream.error)
+        self.assertIn("Ollama", stream.error_message)
+
+    def test_failure_before_any_text_is_the_reply(self):
+        self.fail_with('http_500')
+        stream = self.provider.stream_response([{'role': 'user', 'content': 'hi'}])
+        self.assertEqual("".join(stream), stream.error_message)
+        self.assertFalse(stream.interrupted)
+
+    def test_get_response_raises_on_a_failure_mid_reply(self):
+        self.fail_with('stream_error')
+        with self.assertRaises(AIResponseError): self.provider.get_response([{'role': 'user', 'content': 'hi'}])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+#
+# File: tests/test_audio_output.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.services.audio_output import PROACTIVE_PRIORITY, USER_PRIORITY, AudioOutput
+import threading
+import unittest
+
+class RecordingTTS:
+    """Plays nothing; records which chunks were started. before_play runs in the take-to-play window."""
+    def __init__(self, before_play=None):
+        self.played = []; self.stops = 0; self.before_play = before_play
+        self.release = threading.Event(); self.release.set()
+
+    def play_audio(self, audio, still_wanted=None):
+        if self.before_play: self.before_play(audio)
+        if still_wanted and not still_wanted(): return False
+        self.played.append(audio); self.release.wait(5)
+        return True
+
+    def stop_playback(self):
+        self.stops += 1; self.release.set()
+
+class AudioOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.output = AudioOutput()
+
+    def tearDown(self):
+        self.output.stop()
+
+    def test_barge_in_between_taking_and_playing_a_chunk_is_not_lost(self):
+        tts = RecordingTTS(before_play=lambda audio: self.output.barge_in())
+        utterance = self.output.open(tts); utterance.put("chunk"); utterance.close()
+        utterance.wait(5)
+        self.assertEqual(utterance.state, 'barged_in')
+        self.assertEqual(tts.played, [])
+
+    def test_user_reply_preempts_a_proactive_one(self):
+        tts = RecordingTTS(); tts.release.clear()
+        proactive = self.output.open(tts, priority=PROACTIVE_PRIORITY); proactive.put("tip")
+        while not tts.played: threading.Event().wait(0.01)
+        reply = self.output.open(tts, priority=USER_PRIORITY); reply.put("answer"); reply.close()
+        self.assertTrue(reply.wait(5))
+        self.assertEqual(proactive.state, 'preempted')
+        self.assertEqual(tts.played, ["tip", "answer"])
+
+    def test_stale_utterance_is_dropped_unplayed(self):
+        tts = RecordingTTS(); tts.release.clear()
+        first = self.output.open(tts); first.put("first")
+        stale = self.output.open(tts, max_wait_seconds=0); stale.put("late"); stale.close()
+        stale.wait(5); first.cancel()
+        self.assertEqual(stale.state, 'stale')
+        self.assertNotIn("late", tts.played)
+
+    def test_call_runs_on_the_playback_thread_between_chunks(self):
+        tts = RecordingTTS(); tts.release.clear()
+        utterance = self.output.open(tts); utterance.put("chunk")
+        while not tts.played: threading.Event().wait(0.01)
+        threading.Timer(0.1, tts.release.set).start()
+        # Waits for the chunk in progress, then runs where playback runs.
+        self.assertEqual(self.output.call(lambda: threading.current_thread().name), "AudioOutput")
+        utterance.cancel()
+
+if __name__ == "__main__":
+    unittest.main()
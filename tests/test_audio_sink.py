@@ -0,0 +1,54 @@
+#
+# File: tests/test_audio_sink.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.services.audio_sink import PCMAudioSink, StreamingClip
+from unittest import mock
+import threading
+import types
+import unittest
+
+def fake_pyaudio(on_open=None):
+    """A pyaudio stand-in whose stream never calls back, so fed audio stays in the ring."""
+    class Stream:
+        def start_stream(self): pass
+        def stop_stream(self): pass
+        def close(self): pass
+    class PyAudio:
+        def get_format_from_width(self, width): return width
+        def open(self, **kwargs):
+            if on_open: on_open()
+            return Stream()
+        def terminate(self): pass
+    return types.SimpleNamespace(PyAudio=PyAudio, paContinue=0)
+
+class PCMAudioSinkTest(unittest.TestCase):
+    def make_sink(self, on_open=None):
+        patcher = mock.patch.dict('sys.modules', {'pyaudio': fake_pyaudio(on_open)}); patcher.start()
+        sink = PCMAudioSink(); sink.configure({'idle_close_seconds': 60})
+        self.addCleanup(sink.close); self.addCleanup(patcher.stop)
+        return sink
+
+    def test_stop_while_the_device_opens_is_not_lost(self):
+        sink = self.make_sink(on_open=lambda: sink.stop())
+        self.assertTrue(sink.play(StreamingClip.from_bytes(b"\x01\x00" * 512)))
+        self.assertEqual(sink.ring.size, 0)
+
+    def test_stop_before_play_is_seen_through_still_wanted(self):
+        sink = self.make_sink(); wanted = threading.Event()
+        self.assertFalse(sink.play(StreamingClip.from_bytes(b"\x01\x00" * 512), still_wanted=wanted.is_set))
+        self.assertIsNone(sink.ring)
+
+    def test_a_new_clip_plays_after_a_stop(self):
+        sink = self.make_sink(); sink.stop()
+        clip = StreamingClip.from_bytes(b"\x01\x00" * 16)
+        # Nothing drains the ring here, so play() waits for it; stopping ends that wait.
+        threading.Timer(0.2, sink.stop).start()
+        self.assertTrue(sink.play(clip))
+        self.assertEqual(sink.stats()['clips'], 1)
+        self.assertEqual(sink.stats()['stopped'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+#
+# File: tests/test_backend_router.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from src.services.backend_router import AbortSignal, BackendRouter
+import threading
+import time
+import unittest
+
+def blocking_backend(name, abortable):
+    """A backend that never answers until its connection is torn down."""
+    torn_down = threading.Event()
+    def deltas():
+        with abortable(torn_down.set):
+            torn_down.wait(10)
+        raise ConnectionError(f"{name} connection closed")
+        yield
+    return deltas()
+
+def timed_backend(first_token_seconds):
+    """A backend whose first token arrives after first_token_seconds (None: never)."""
+    def open_stream(name, abortable):
+        torn_down = threading.Event()
+        def deltas():
+            with abortable(torn_down.set):
+                if torn_down.wait(10 if first_token_seconds is None else first_token_seconds): return
+            yield f"{name} answered"
+        return deltas()
+    return open_stream
+
+def route(router, backends, requests):
+    for _ in range(requests):
+        list(router.stream(lambda name, abortable: backends[name](name, abortable)))
+
+class OrderTest(unittest.TestCase):
+    def test_cancelled_hedge_does_not_count_as_fast(self):
+        # The hedge starts 20 ms before the primary answers and is cancelled without a token.
+        router = BackendRouter(['primary', 'secondary'], hedge_default_ms=100, hedge_min_ms=100)
+        route(router, {'primary': timed_backend(0.12), 'secondary': timed_backend(None)}, BackendRouter.MIN_SAMPLES)
+        self.assertEqual(router.counters['hedges'], BackendRouter.MIN_SAMPLES)
+        self.assertEqual(list(router.stats['secondary'].first_token_latencies), [])
+        self.assertEqual(router.order(), ['primary', 'secondary'])
+
+    def test_backend_that_keeps_winning_hedges_moves_first(self):
+        router = BackendRouter(['primary', 'secondary'], hedge_default_ms=50, hedge_min_ms=50)
+        route(router, {'primary': timed_backend(None), 'secondary': timed_backend(0.01)}, BackendRouter.MIN_SAMPLES)
+        self.assertEqual(router.counters['secondary_wins'], BackendRouter.MIN_SAMPLES)
+        self.assertEqual(router.order(), ['secondary', 'primary'])
+
+    def test_measured_backends_are_ordered_by_latency(self):
+        router = BackendRouter(['slow', 'fast'])
+        for _ in range(BackendRouter.MIN_SAMPLES):
+            router.stats['slow'].record_first_token(0.5); router.stats['fast'].record_first_token(0.1)
+        self.assertEqual(router.order(), ['fast', 'slow'])
+
+class AbortTest(unittest.TestCase):
+    def test_abort_ends_the_stream_without_falling_back(self):
+        router = BackendRouter(['primary', 'secondary'], hedge_default_ms=5000)
+        signal = AbortSignal(); opened = []
+        def open_stream(name, abortable):
+            opened.append(name); return blocking_backend(name, abortable)
+        threading.Timer(0.1, signal.fire).start()
+        started_at = time.monotonic(); deltas = list(router.stream(open_stream, abortable=signal.abortable))
+        self.assertLess(time.monotonic() - started_at, 2)
+        self.assertEqual(deltas, []); self.assertEqual(opened, ['primary'])
+        self.assertEqual(router.counters['fallbacks'], 0)
+
+    def test_losing_hedge_is_shut_down(self):
+        router = BackendRouter(['slow', 'fast'], hedge_default_ms=50, hedge_min_ms=0)
+        torn_down = threading.Event()
+        def open_stream(name, abortable):
+            if name == 'fast': return (delta for delta in ["hello"])
+            def deltas():
+                with abortable(torn_down.set):
+                    torn_down.wait(10)
+                yield "late"
+            return deltas()
+        self.assertEqual(list(router.stream(open_stream)), ["hello"])
+        self.assertTrue(torn_down.wait(1))
+
+if __name__ == "__main__":
+    unittest.main()
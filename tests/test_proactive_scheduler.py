@@ -0,0 +1,36 @@
+#
+# File: tests/test_proactive_scheduler.py
+#
+# ----- PASTE THIS ENTIRE BLOCK INTO YOUR FILE -----
+#
+
+from PyQt5.QtCore import QCoreApplication
+from src.core.proactive_scheduler import ProactiveScheduler
+import unittest
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+class ProactiveSchedulerTest(unittest.TestCase):
+    def make_scheduler(self, busy):
+        scheduler = ProactiveScheduler(lambda: "Editor", is_busy=lambda: busy[0])
+        scheduler.configure({'enabled': True, 'frequency_seconds': 60, 'max_events_per_hour': 1})
+        fired = []; scheduler.proactive_due.connect(lambda: fired.append(True))
+        self.addCleanup(scheduler.stop)
+        return scheduler, fired
+
+    def test_busy_tick_is_neither_fired_nor_counted_against_the_cap(self):
+        busy = [True]; scheduler, fired = self.make_scheduler(busy)
+        scheduler._tick()
+        self.assertEqual((scheduler.counters['fired'], scheduler.counters['suppressed_busy']), (0, 1))
+        self.assertEqual(fired, []); self.assertEqual(len(scheduler.fired_at), 0)
+        busy[0] = False; scheduler._tick()
+        self.assertEqual(scheduler.counters['fired'], 1); self.assertEqual(fired, [True])
+
+    def test_busy_tick_does_not_consume_a_window_change(self):
+        busy = [True]; scheduler, fired = self.make_scheduler(busy)
+        scheduler.activity_since_last_event = False
+        scheduler._tick(); busy[0] = False; scheduler._tick()
+        self.assertEqual(fired, [True]) # the switch to "Editor" still counts as something new
+
+if __name__ == "__main__":
+    unittest.main()